@@ -1,26 +1,34 @@
 """
 AI package for natural language task processing.
 """
-from .groq_client import GroqClient, get_groq_client
-from .agent import TaskAgent, get_task_agent
+from .groq_client import GroqClient, LLMCache, get_groq_client, aclose_http_clients
+from .agent import TaskAgent, BatchingTaskParser, get_task_agent, get_batching_parser
 from .parsers import (
     parse_datetime,
     extract_priority,
     infer_category,
     extract_tags,
     parse_task_metadata,
+    parse_search_filters,
+    parse_update_command,
     validate_task_data
 )
 
 __all__ = [
     "GroqClient",
+    "LLMCache",
     "get_groq_client",
+    "aclose_http_clients",
     "TaskAgent",
     "get_task_agent",
+    "BatchingTaskParser",
+    "get_batching_parser",
     "parse_datetime",
     "extract_priority",
     "infer_category",
     "extract_tags",
     "parse_task_metadata",
+    "parse_search_filters",
+    "parse_update_command",
     "validate_task_data"
 ]
@@ -1,14 +1,39 @@
 """
 LangChain agent for natural language task processing.
 """
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
+from itertools import islice
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
+
+from rapidfuzz import fuzz, process
 
 from ai.groq_client import get_groq_client
-from ai.parsers import parse_task_metadata, validate_task_data
+from ai.json_utils import parse_json_from_text
+from ai.parsers import (
+    parse_task_metadata, validate_task_data, parse_search_filters, parse_update_command
+)
+from ai.semantic_cache import SemanticCache
 
 logger = logging.getLogger(__name__)
 
+_UPDATE_SYS_PROMPT = """You are a task update parser. Extract the task identifier and updates from natural language.
+
+Given a list of existing tasks and an update command, identify which task to update and what changes to make.
+
+Return a JSON object with:
+- task_match: string (keywords to match the task)
+- updates: object with fields to update (status, priority, title, etc.)
+
+Examples:
+Input: "Mark the groceries task as done"
+Output: {"task_match": "groceries", "updates": {"status": "completed"}}
+
+Input: "Change the meeting priority to high"
+Output: {"task_match": "meeting", "updates": {"priority": "high"}}
+
+Only return valid JSON, no additional text."""
+
 
 class TaskAgent:
     """LangChain agent for intelligent task processing."""
@@ -22,7 +47,10 @@ class TaskAgent:
         """
         self.groq_client = get_groq_client()
         self.model = model
-        logger.info(f"TaskAgent initialized with model: {model}")
+        # Separate namespaces: parses and search filters must never be mixed
+        self._parse_cache = SemanticCache("parse_task")
+        self._search_cache = SemanticCache("search_tasks")
+        logger.info("TaskAgent initialized with model: %s", model)
     
     def parse_task_nl(self, natural_language: str, current_time: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -35,30 +63,231 @@ class TaskAgent:
         Returns:
             List of validated task data dictionaries
         """
+        # Relative dates depend on the user's clock, so only reuse parses made at the same time
+        cached = self._parse_cache.get(natural_language, context=current_time)
+        if cached is not None:
+            return cached
+        
         try:
             # Use Groq client for parsing (now returns a list)
             task_data_list = self.groq_client.parse_task_from_nl(natural_language, current_time=current_time)
+            validated_list = self._validate_parsed_tasks(task_data_list)
+            self._parse_cache.set(natural_language, validated_list, context=current_time)
+            return validated_list
             
-            validated_list = []
-            for task_data in task_data_list:
-                # Validate and clean each task
+        except Exception as e:
+            logger.warning("LLM parsing failed, using fallback parser: %s", e)
+            return self._fallback_parse(natural_language)
+    
+    async def parse_task_nl_async(
+        self,
+        natural_language: str,
+        current_time: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Async variant of parse_task_nl; use_cache=False skips every cache layer."""
+        if use_cache:
+            cached = await self._parse_cache.aget(natural_language, context=current_time)
+            if cached is not None:
+                return cached
+        
+        try:
+            task_data_list = await self.groq_client.parse_task_from_nl_async(
+                natural_language, current_time=current_time, use_cache=use_cache
+            )
+            validated_list = self._validate_parsed_tasks(task_data_list)
+            if use_cache:
+                await self._parse_cache.aset(natural_language, validated_list, context=current_time)
+            return validated_list
+            
+        except Exception as e:
+            logger.warning("LLM parsing failed, using fallback parser: %s", e)
+            return self._fallback_parse(natural_language)
+    
+    async def iter_task_nl_async(
+        self,
+        natural_language: str,
+        current_time: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse tasks from natural language, yielding each one as soon as it is ready.
+        
+        The LLM response is streamed, so callers can start acting on the first
+        task while later ones are still being generated.
+        
+        Args:
+            natural_language: Natural language task description
+            current_time: Optional ISO timestamp of the user's current time for reference
+            
+        Yields:
+            Validated task data dictionaries
+        """
+        cached = await self._parse_cache.aget(natural_language, context=current_time)
+        if cached is not None:
+            for task_data in cached:
+                yield task_data
+            return
+        
+        validated_list = []
+        try:
+            async for task_data in self.groq_client.parse_task_stream_async(
+                natural_language, current_time=current_time
+            ):
                 try:
                     validated = validate_task_data(task_data)
-                    validated_list.append(validated)
-                    logger.info(f"Successfully parsed task: {validated.get('title')}")
                 except Exception as val_err:
-                    logger.warning(f"Skipping invalid task in batch: {val_err}")
+                    logger.warning("Skipping invalid task in stream: %s", val_err)
+                    continue
+                validated_list.append(validated)
+                yield dict(validated)
+        except Exception as e:
+            if validated_list:
+                # Tasks already handed out stay valid; don't duplicate them
+                logger.warning("LLM stream failed after %s tasks: %s", len(validated_list), e)
+                return
+            logger.warning("LLM parsing failed, using fallback parser: %s", e)
+        
+        if not validated_list:
+            for task_data in self._fallback_parse(natural_language):
+                yield task_data
+            return
+        
+        await self._parse_cache.aset(natural_language, validated_list, context=current_time)
+    
+    def parse_task_batch_nl(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Parse several independent task descriptions, sharing one LLM call.
+        
+        Args:
+            natural_language_inputs: Natural language task descriptions
+            current_time: Optional ISO timestamp shared by all inputs
             
-            if not validated_list:
-                 raise ValueError("No valid tasks found in parsed output")
-                 
-            return validated_list
+        Returns:
+            One list of validated task data dictionaries per input, in input order
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [
+            self._parse_cache.get(text, context=current_time) for text in natural_language_inputs
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        try:
+            parsed = self.groq_client.parse_tasks_batch_from_nl(
+                [natural_language_inputs[i] for i in pending],
+                current_time=current_time
+            )
+        except Exception as e:
+            logger.warning("Batched LLM parsing failed, parsing inputs individually: %s", e)
+            for i in pending:
+                results[i] = self.parse_task_nl(natural_language_inputs[i], current_time=current_time)
+            return results
+        
+        for i, task_data_list in zip(pending, parsed):
+            text = natural_language_inputs[i]
+            try:
+                results[i] = self._validate_parsed_tasks(task_data_list)
+                self._parse_cache.set(text, results[i], context=current_time)
+            except Exception as e:
+                logger.warning("LLM parsing failed, using fallback parser: %s", e)
+                results[i] = self._fallback_parse(text)
+        
+        return results
+    
+    async def parse_task_batch_nl_async(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Async variant of parse_task_batch_nl."""
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(natural_language_inputs)
+        async for i, result in self.iter_task_batch_nl_async(natural_language_inputs, current_time):
+            results[i] = result
+        return results
+    
+    async def iter_task_batch_nl_async(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Parse several task descriptions, yielding each result as soon as it is ready.
+        
+        Cache hits are yielded first; the rest share one streamed LLM call, so
+        early inputs resolve before the whole batch response has arrived.
+        
+        Args:
+            natural_language_inputs: Natural language task descriptions
+            current_time: Optional ISO timestamp shared by all inputs
             
+        Yields:
+            (input index, validated task data dictionaries) pairs; every input
+            is yielded exactly once
+        """
+        cached = await asyncio.gather(*(
+            self._parse_cache.aget(text, context=current_time) for text in natural_language_inputs
+        ))
+        pending = []
+        for i, result in enumerate(cached):
+            if result is None:
+                pending.append(i)
+            else:
+                yield i, result
+        if not pending:
+            return
+        
+        delivered = set()
+        try:
+            async for j, task_data_list in self.groq_client.parse_tasks_batch_stream_async(
+                [natural_language_inputs[i] for i in pending],
+                current_time=current_time
+            ):
+                i = pending[j]
+                text = natural_language_inputs[i]
+                try:
+                    result = self._validate_parsed_tasks(task_data_list)
+                    await self._parse_cache.aset(text, result, context=current_time)
+                except Exception as e:
+                    logger.warning("LLM parsing failed, using fallback parser: %s", e)
+                    result = self._fallback_parse(text)
+                delivered.add(i)
+                yield i, result
         except Exception as e:
-            logger.warning(f"LLM parsing failed, using fallback parser: {str(e)}")
-            # Fallback to rule-based parsing (likely single task)
-            task_data = parse_task_metadata(natural_language)
-            return [validate_task_data(task_data)]
+            logger.warning("Batched LLM parsing failed, parsing remaining inputs individually: %s", e)
+        
+        remaining = [i for i in pending if i not in delivered]
+        individual = await asyncio.gather(*(
+            self.parse_task_nl_async(natural_language_inputs[i], current_time=current_time)
+            for i in remaining
+        ))
+        for i, result in zip(remaining, individual):
+            yield i, result
+    
+    def _validate_parsed_tasks(self, task_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate LLM output, skipping invalid tasks; raises if none are valid."""
+        validated_list = []
+        for task_data in task_data_list:
+            # Validate and clean each task
+            try:
+                validated = validate_task_data(task_data)
+                validated_list.append(validated)
+                logger.info("Successfully parsed task: %s", validated.get("title"))
+            except Exception as val_err:
+                logger.warning("Skipping invalid task in batch: %s", val_err)
+        
+        if not validated_list:
+             raise ValueError("No valid tasks found in parsed output")
+        
+        return validated_list
+    
+    def _fallback_parse(self, natural_language: str) -> List[Dict[str, Any]]:
+        """Rule-based parse used when the LLM path fails (likely single task)."""
+        task_data = parse_task_metadata(natural_language)
+        return [validate_task_data(task_data)]
     
     def search_tasks_nl(self, query: str) -> Dict[str, Any]:
         """
@@ -70,13 +299,45 @@ class TaskAgent:
         Returns:
             Dictionary with filter parameters
         """
+        filters = parse_search_filters(query)
+        if filters is not None:
+            return filters
+        
+        cached = self._search_cache.get(query)
+        if cached is not None:
+            return cached
+        
         try:
             filters = self.groq_client.search_query_to_filters(query)
-            logger.info(f"Search filters: {filters}")
+            logger.info("Search filters: %s", filters)
+            self._search_cache.set(query, filters)
             return filters
             
         except Exception as e:
-            logger.error(f"Error parsing search query: {str(e)}")
+            logger.error("Error parsing search query: %s", e)
+            # Fallback to simple text search
+            return {"search_text": query}
+    
+    async def search_tasks_nl_async(self, query: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of search_tasks_nl; use_cache=False skips every cache layer."""
+        filters = parse_search_filters(query)
+        if filters is not None:
+            return filters
+        
+        if use_cache:
+            cached = await self._search_cache.aget(query)
+            if cached is not None:
+                return cached
+        
+        try:
+            filters = await self.groq_client.search_query_to_filters_async(query, use_cache=use_cache)
+            logger.info("Search filters: %s", filters)
+            if use_cache:
+                await self._search_cache.aset(query, filters)
+            return filters
+            
+        except Exception as e:
+            logger.error("Error parsing search query: %s", e)
             # Fallback to simple text search
             return {"search_text": query}
     
@@ -91,94 +352,224 @@ class TaskAgent:
         Returns:
             Dictionary with task_id and updates
         """
-        system_prompt = """You are a task update parser. Extract the task identifier and updates from natural language.
-
-Given a list of existing tasks and an update command, identify which task to update and what changes to make.
-
-Return a JSON object with:
-- task_match: string (keywords to match the task)
-- updates: object with fields to update (status, priority, title, etc.)
-
-Examples:
-Input: "Mark the groceries task as done"
-Output: {"task_match": "groceries", "updates": {"status": "completed"}}
-
-Input: "Change the meeting priority to high"
-Output: {"task_match": "meeting", "updates": {"priority": "high"}}
-
-Only return valid JSON, no additional text."""
-
+        update = parse_update_command(natural_language)
+        if update is not None:
+            return update
+        
+        try:
+            response = self.groq_client.chat_completion(
+                self._update_messages(natural_language, existing_tasks),
+                temperature=0.3
+            )
+            return parse_json_from_text(response)
+            
+        except Exception as e:
+            logger.error("Error extracting task update: %s", e)
+            raise ValueError(f"Could not parse update command: {natural_language}")
+    
+    async def extract_task_update_async(
+        self,
+        natural_language: str,
+        existing_tasks: list,
+        use_cache: bool = True
+    ) -> Dict[str, Any]:
+        """Async variant of extract_task_update; use_cache=False bypasses the response cache."""
+        update = parse_update_command(natural_language)
+        if update is not None:
+            return update
+        
+        try:
+            response = await self.groq_client.chat_completion_async(
+                self._update_messages(natural_language, existing_tasks),
+                temperature=0.3,
+                use_cache=use_cache
+            )
+            return parse_json_from_text(response)
+            
+        except Exception as e:
+            logger.error("Error extracting task update: %s", e)
+            raise ValueError(f"Could not parse update command: {natural_language}")
+    
+    def _update_messages(self, natural_language: str, existing_tasks: list) -> List[Dict[str, str]]:
+        """Build the chat messages for an update command."""
         user_message = f"""Update command: {natural_language}
 
 Existing tasks:
 {self._format_tasks_for_prompt(existing_tasks)}"""
 
-        messages = [
-            {"role": "system", "content": system_prompt},
+        return [
+            {"role": "system", "content": _UPDATE_SYS_PROMPT},
             {"role": "user", "content": user_message}
         ]
-        
-        try:
-            response = self.groq_client.chat_completion(messages, temperature=0.3)
-            
-            import json
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return json.loads(response)
-                
-        except Exception as e:
-            logger.error(f"Error extracting task update: {str(e)}")
-            raise ValueError(f"Could not parse update command: {natural_language}")
     
     def _format_tasks_for_prompt(self, tasks: list) -> str:
         """Format tasks for LLM prompt."""
         if not tasks:
             return "No existing tasks"
         
-        formatted = []
-        for task in tasks[:10]:  # Limit to 10 tasks to avoid token limits
-            formatted.append(
-                f"- {task.get('title')} (ID: {task.get('id')}, Status: {task.get('status')})"
-            )
+        # Limit to 10 tasks to avoid token limits
+        return "\n".join(
+            f"- {task.get('title')} (ID: {task.get('id')}, Status: {task.get('status')})"
+            for task in islice(tasks, 10)
+        )
+    
+    def match_tasks(self, task_match: str, tasks: list) -> list:
+        """
+        Find tasks whose title contains the search string (case-insensitive).
         
-        return "\n".join(formatted)
+        Args:
+            task_match: String to look for in task titles
+            tasks: List of tasks to search
+            
+        Returns:
+            Matching tasks, in their original order
+        """
+        task_match_lower = task_match.lower()
+        return [task for task in tasks if task_match_lower in (task.get('title') or '').lower()]
     
-    def find_matching_task(self, task_match: str, tasks: list) -> Optional[str]:
+    def find_matching_task(self, task_match: str, tasks: list) -> Tuple[Optional[str], list]:
         """
         Find task ID that matches the search string.
         
+        Substring matches come from match_tasks. When that yields no single
+        match, fuzzy matching picks a clear winner if there is one.
+        
         Args:
             task_match: String to match against task titles
             tasks: List of tasks to search
             
         Returns:
-            Task ID if single match found, None otherwise
+            Tuple of (task ID if a single match was found else None, substring
+            matches), so callers can list the candidates when it is ambiguous
         """
-        task_match_lower = task_match.lower()
-        matches = []
-        
-        for task in tasks:
-            title_lower = task.get('title', '').lower()
-            if task_match_lower in title_lower:
-                matches.append(task)
+        matches = self.match_tasks(task_match, tasks)
         
         if len(matches) == 1:
-            return matches[0]['id']
-        elif len(matches) > 1:
+            return matches[0]['id'], matches
+        
+        fuzzy_id = self._fuzzy_match(task_match, matches or tasks)
+        if fuzzy_id is not None:
+            return fuzzy_id, matches
+        
+        if len(matches) > 1:
             # Multiple matches - need clarification
-            logger.warning(f"Multiple tasks match '{task_match}': {[t['title'] for t in matches]}")
-            return None
+            logger.warning("Multiple tasks match '%s': %s", task_match, [t["title"] for t in matches])
         else:
-            logger.warning(f"No tasks match '{task_match}'")
+            logger.warning("No tasks match '%s'", task_match)
+        return None, matches
+    
+    def _fuzzy_match(self, task_match: str, tasks: list) -> Optional[str]:
+        """Return the ID of the best fuzzy title match if it clearly beats the runner-up."""
+        if not tasks:
+            return None
+        
+        results = process.extract(
+            task_match,
+            {task['id']: task.get('title') or '' for task in tasks},
+            scorer=fuzz.WRatio,
+            limit=2,
+            score_cutoff=75
+        )
+        if not results:
             return None
+        
+        if len(results) == 1 or results[0][1] - results[1][1] >= 10:
+            logger.info("Fuzzy matched '%s' to '%s' (score %.0f)", task_match, results[0][0], results[0][1])
+            return results[0][2]
+        return None
+
+
+class BatchingTaskParser:
+    """Coalesces concurrent parse requests into shared LLM calls."""
+    
+    def __init__(self, agent: TaskAgent, max_batch: int = 16, max_wait_ms: float = 25):
+        """
+        Initialize the batching parser.
+        
+        Args:
+            agent: Task agent used to parse each batch
+            max_batch: Maximum number of requests per LLM call
+            max_wait_ms: How long the first request in a batch waits for company
+        """
+        self.agent = agent
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: set = set()
+    
+    async def parse(self, natural_language: str, current_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Parse task from natural language, batched with concurrent callers.
+        
+        Args:
+            natural_language: Natural language task description
+            current_time: Optional ISO timestamp of the user's current time for reference
+            
+        Returns:
+            List of validated task data dictionaries
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((natural_language, current_time, future))
+        return await future
+    
+    async def _run(self) -> None:
+        """Drain the queue into batches of up to max_batch requests."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Requests can only share a prompt when they share the user's clock
+            groups: Dict[Optional[str], List[Tuple[str, Optional[str], asyncio.Future]]] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            
+            for current_time, items in groups.items():
+                task = loop.create_task(self._parse_group(current_time, items))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+    
+    async def _parse_group(
+        self,
+        current_time: Optional[str],
+        items: List[Tuple[str, Optional[str], asyncio.Future]]
+    ) -> None:
+        """Parse one batch of requests and resolve their futures."""
+        futures = [future for _, _, future in items]
+        try:
+            # Callers are released one by one as the streamed batch completes
+            async for i, result in self.agent.iter_task_batch_nl_async(
+                [natural_language for natural_language, _, _ in items],
+                current_time
+            ):
+                if not futures[i].done():
+                    futures[i].set_result(result)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
 
 
 # Global instance
 _task_agent: Optional[TaskAgent] = None
+_batching_parser: Optional[BatchingTaskParser] = None
 
 
 def get_task_agent() -> TaskAgent:
@@ -192,3 +583,16 @@ def get_task_agent() -> TaskAgent:
     if _task_agent is None:
         _task_agent = TaskAgent()
     return _task_agent
+
+
+def get_batching_parser() -> BatchingTaskParser:
+    """
+    Get or create the global batching parser instance.
+    
+    Returns:
+        BatchingTaskParser instance
+    """
+    global _batching_parser
+    if _batching_parser is None:
+        _batching_parser = BatchingTaskParser(get_task_agent())
+    return _batching_parser
@@ -0,0 +1,43 @@
+"""
+SQLite storage for the LLM response caches.
+
+Setting CACHE_DB_PATH persists cached responses across restarts and shares
+them between worker processes. WAL mode lets readers proceed while another
+process writes.
+"""
+import sqlite3
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS exact_cache (
+    k TEXT PRIMARY KEY,
+    v TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS semantic_cache (
+    namespace TEXT NOT NULL,
+    context TEXT,
+    embedding BLOB NOT NULL,
+    payload TEXT NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS semantic_cache_namespace ON semantic_cache (namespace, stored_at);
+"""
+
+
+def connect_cache_db(path: str) -> sqlite3.Connection:
+    """
+    Open the cache database, creating it and its tables if needed.
+
+    Args:
+        path: SQLite database file
+
+    Returns:
+        Autocommit connection usable from any thread (callers serialize access)
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
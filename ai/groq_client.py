@@ -2,18 +2,252 @@
 Groq API client for LLM interactions.
 """
 import os
+import json
+import time
+import atexit
+import sqlite3
+import hashlib
 import logging
-from typing import Optional, Dict, Any, List
-from groq import Groq
+import threading
+import importlib.util
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from ai.cache_db import connect_cache_db
+from ai.json_utils import ArrayItemParser, parse_json_from_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Completions at or below this temperature are treated as deterministic and cached
+CACHEABLE_TEMPERATURE = 0.3
+
+# Request options that change the response shape and must bypass the cache
+_UNCACHEABLE_KWARGS = frozenset({"stream", "tools", "tool_choice", "functions", "function_call"})
+
+# System prompts are built once; only the user's time varies per parse request
+_PARSE_TASK_SYS_TEMPLATE = """You are a high-precision task parser. Extract structured task information from natural language.
+        
+{time_context}
+
+CRITICAL RULES:
+1. RELATIVE DATES: "today", "tomorrow", "tonight", "this friday" etc. MUST be calculated relative to the '{time_context}'.
+   - If today is Saturday, Jan 3rd, then "today" is Saturday Jan 3rd.
+   - If today is Saturday, Jan 3rd, then "tomorrow" is Sunday Jan 4th.
+2. TIMEZONES: You MUST return the `due_date` with the SAME timezone offset as the Current User Time provided.
+   - If the user time ends in '+05:30' or 'GMT+5:30', your `due_date` must use '+05:30'.
+   - DO NOT return UTC (Z) if the user provides a local offset.
+3. DEFAULT TIME: If a date is mentioned but no specific time is given (e.g., "today"), default to 23:59:59 of that day.
+   - DO NOT default to 00:00:00 as it causes timezone flip issues.
+
+Return a JSON array of objects (even for one task) with these fields:
+- title: string (required, concise)
+- description: string (optional)
+- priority: "low" | "medium" | "high" (default: "medium")
+- category: string (optional, e.g., "work", "personal", "sport")
+- due_date: ISO 8601 datetime string with timezone (optional)
+- tags: array of strings (optional)
+
+Example:
+Input: "batmitton today"
+User Time: Saturday, January 3, 2026, 8:50 AM GMT+5:30
+Output: [{{"title": "Badminton", "priority": "medium", "due_date": "2026-01-03T23:59:59+05:30", "category": "sport"}}]
+
+Return ONLY valid JSON."""
+
+_SEARCH_SYS_PROMPT = """You are a search query parser. Convert natural language queries into database filters.
+
+Return a JSON object with these optional fields:
+- status: "pending" | "in_progress" | "completed"
+- priority: "low" | "medium" | "high"
+- search_text: string (for title/description search)
+- category: string
+
+Examples:
+Input: "Show me all high priority tasks"
+Output: {"priority": "high"}
+
+Input: "What tasks are completed?"
+Output: {"status": "completed"}
+
+Input: "Find tasks about groceries"
+Output: {"search_text": "groceries"}
+
+Only return valid JSON, no additional text."""
+
+# One connection pool per process, shared by every GroqClient
+_http_clients: Optional[Tuple[Any, Any]] = None
+_http_clients_lock = threading.Lock()
+
+
+def _get_http_clients() -> Tuple[Any, Any]:
+    """
+    Create (once) the pooled sync and async HTTP clients used for Groq calls.
+    
+    HTTP/2 is enabled when the optional h2 package is installed, so
+    concurrent requests share one connection instead of each opening TLS.
+    
+    Returns:
+        Tuple of (httpx.Client, httpx.AsyncClient)
+    """
+    global _http_clients
+    if _http_clients is None:
+        with _http_clients_lock:
+            if _http_clients is None:
+                import httpx
+                
+                options = {
+                    "http2": importlib.util.find_spec("h2") is not None,
+                    "limits": httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                    "timeout": httpx.Timeout(30.0, connect=5.0)
+                }
+                sync_client = httpx.Client(**options)
+                atexit.register(sync_client.close)
+                _http_clients = (sync_client, httpx.AsyncClient(**options))
+    return _http_clients
+
+
+async def aclose_http_clients() -> None:
+    """Close the shared HTTP clients, if they were created. Call on shutdown."""
+    global _http_clients
+    with _http_clients_lock:
+        clients, _http_clients = _http_clients, None
+    if clients is not None:
+        sync_client, async_client = clients
+        await async_client.aclose()
+        sync_client.close()
+
+
+class LLMCache:
+    """Exact-match LRU cache for deterministic chat completions."""
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600.0, db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            maxsize: Maximum number of responses to keep in memory
+            ttl: Seconds a cached response stays valid
+            db_path: SQLite file shared across processes (default: CACHE_DB_PATH env var)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        
+        db_path = db_path or os.getenv("CACHE_DB_PATH")
+        self._db = connect_cache_db(db_path) if db_path else None
+    
+    @staticmethod
+    def cache_key(
+        model: str,
+        messages: list[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> str:
+        """
+        Build a stable key for a completion request.
+        
+        Returns:
+            SHA-256 hex digest of the request parameters
+        """
+        payload = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "kwargs": kwargs
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Key produced by cache_key
+            
+        Returns:
+            Cached response text, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+            
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+    
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response, evicting the least recently used entry when full.
+        
+        Args:
+            key: Key produced by cache_key
+            value: Response text to cache
+        """
+        with self._lock:
+            self._remember(key, time.monotonic(), value)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO exact_cache (k, v, ts) VALUES (?, ?, ?)",
+                        (key, value, time.time())
+                    )
+                except sqlite3.Error as e:
+                    logger.warning("Could not persist LLM cache entry: %s", e)
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM exact_cache")
+    
+    def _remember(self, key: str, stored_at: float, value: str) -> None:
+        """Add an entry to the in-memory LRU; caller holds the lock."""
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def _load(self, key: str) -> Optional[Tuple[float, str]]:
+        """Fetch an unexpired entry written by any process; caller holds the lock."""
+        now = time.time()
+        try:
+            row = self._db.execute(
+                "SELECT v, ts FROM exact_cache WHERE k = ? AND ts > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Could not read LLM cache entry: %s", e)
+            return None
+        
+        if row is None:
+            return None
+        
+        # Keep the original age so the entry still expires on schedule
+        stored_at = time.monotonic() - (now - row[1])
+        self._remember(key, stored_at, row[0])
+        return stored_at, row[0]
+
 
 class GroqClient:
     """Client for interacting with Groq's LLM API."""
@@ -29,9 +263,48 @@ class GroqClient:
         if not api_key:
             raise ValueError("GROQ_API_KEY must be set in environment variables")
         
-        self.client = Groq(api_key=api_key)
+        self._api_key = api_key
+        self._http_clients: Optional[Tuple[Any, Any]] = None
+        self._bind_http_clients()
         self.model = model
-        logger.info(f"Groq client initialized with model: {model}")
+        self._cache = LLMCache()
+        logger.info("Groq client initialized with model: %s", model)
+    
+    def _bind_http_clients(self) -> None:
+        """(Re)build the SDK clients when the shared HTTP pools were replaced."""
+        http_clients = _get_http_clients()
+        if http_clients is self._http_clients:
+            return
+        
+        # Deferred so importing the ai package stays cheap
+        from groq import AsyncGroq, Groq
+        
+        http_client, async_http_client = http_clients
+        self._client = Groq(api_key=self._api_key, http_client=http_client)
+        self._async_client = AsyncGroq(api_key=self._api_key, http_client=async_http_client)
+        self._http_clients = http_clients
+    
+    @property
+    def client(self) -> Any:
+        """Sync Groq SDK client on the current shared pool (rebuilt after aclose_http_clients)."""
+        self._bind_http_clients()
+        return self._client
+    
+    @client.setter
+    def client(self, value: Any) -> None:
+        self._bind_http_clients()
+        self._client = value
+    
+    @property
+    def async_client(self) -> Any:
+        """Async Groq SDK client on the current shared pool (rebuilt after aclose_http_clients)."""
+        self._bind_http_clients()
+        return self._async_client
+    
+    @async_client.setter
+    def async_client(self, value: Any) -> None:
+        self._bind_http_clients()
+        self._async_client = value
     
     def chat_completion(
         self,
@@ -43,6 +316,9 @@ class GroqClient:
         """
         Get a chat completion from Groq.
         
+        Deterministic requests (temperature <= CACHEABLE_TEMPERATURE) are served
+        from an exact-match cache when the same messages were seen before.
+        
         Args:
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature (0-2)
@@ -52,6 +328,10 @@ class GroqClient:
         Returns:
             Generated text response
         """
+        cache_key, cached = self._check_cache(messages, temperature, max_tokens, kwargs)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -60,104 +340,183 @@ class GroqClient:
                 max_tokens=max_tokens,
                 **kwargs
             )
-            
-            content = response.choices[0].message.content
-            logger.info(f"Groq API call successful. Tokens used: {response.usage.total_tokens}")
-            return content
+            return self._finish_completion(response, cache_key)
             
         except Exception as e:
-            logger.error(f"Groq API error: {str(e)}")
+            logger.error("Groq API error: %s", e)
             raise
     
-    def parse_task_from_nl(self, natural_language: str, current_time: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def chat_completion_async(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        use_cache: bool = True,
+        **kwargs
+    ) -> str:
         """
-        Parse task information from natural language.
+        Get a chat completion from Groq without blocking the event loop.
+        
+        Shares the exact-match cache with chat_completion.
         
         Args:
-            natural_language: Natural language task description
-            current_time: Optional ISO timestamp of the user's current time for reference
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens to generate
+            use_cache: Set False to neither read nor write the cache
+            **kwargs: Additional parameters for the API
             
         Returns:
-            List of dictionaries with extracted task fields
+            Generated text response
         """
+        cache_key, cached = self._check_cache(messages, temperature, max_tokens, kwargs, use_cache)
+        if cached is not None:
+            return cached
         
-        time_context = f"Current User Time: {current_time}" if current_time else "Current User Time: Unknown"
-
-        system_prompt = f"""You are a high-precision task parser. Extract structured task information from natural language.
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+            return self._finish_completion(response, cache_key)
+            
+        except Exception as e:
+            logger.error("Groq API error: %s", e)
+            raise
+    
+    def chat_completion_stream(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> Iterator[str]:
+        """
+        Stream a chat completion from Groq as text deltas.
         
-{time_context}
-
-CRITICAL RULES:
-1. RELATIVE DATES: "today", "tomorrow", "tonight", "this friday" etc. MUST be calculated relative to the '{time_context}'.
-   - If today is Saturday, Jan 3rd, then "today" is Saturday Jan 3rd.
-   - If today is Saturday, Jan 3rd, then "tomorrow" is Sunday Jan 4th.
-2. TIMEZONES: You MUST return the `due_date` with the SAME timezone offset as the Current User Time provided.
-   - If the user time ends in '+05:30' or 'GMT+5:30', your `due_date` must use '+05:30'.
-   - DO NOT return UTC (Z) if the user provides a local offset.
-3. DEFAULT TIME: If a date is mentioned but no specific time is given (e.g., "today"), default to 23:59:59 of that day.
-   - DO NOT default to 00:00:00 as it causes timezone flip issues.
-
-Return a JSON array of objects (even for one task) with these fields:
-- title: string (required, concise)
-- description: string (optional)
-- priority: "low" | "medium" | "high" (default: "medium")
-- category: string (optional, e.g., "work", "personal", "sport")
-- due_date: ISO 8601 datetime string with timezone (optional)
-- tags: array of strings (optional)
-
-Example:
-Input: "batmitton today"
-User Time: Saturday, January 3, 2026, 8:50 AM GMT+5:30
-Output: [{{"title": "Badminton", "priority": "medium", "due_date": "2026-01-03T23:59:59+05:30", "category": "sport"}}]
-
-Return ONLY valid JSON."""
-
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": natural_language}
-        ]
+        Cached responses are replayed as a single chunk, and a completed
+        stream is stored in the cache under the same rules as chat_completion.
         
-        response = self.chat_completion(messages, temperature=0.3)
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens to generate
+            **kwargs: Additional parameters for the API
+            
+        Yields:
+            Pieces of the generated text, in order
+        """
+        cache_key, cached = self._check_cache(messages, temperature, max_tokens, kwargs)
+        if cached is not None:
+            yield cached
+            return
         
-        # Parse JSON response
-        import json
         try:
-            # Clean up the response
-            content = response.strip()
-            
-            # Check for Markdown code blocks and strip them
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            # Attempt to parse directly first
-            try:
-                data = json.loads(content)
-            except json.JSONDecodeError:
-                # Greedy search for the largest possible JSON object/array
-                # Look for first [ and last ] or first { and last }
-                bracket_start = content.find('[')
-                bracket_end = content.rfind(']')
-                brace_start = content.find('{')
-                brace_end = content.rfind('}')
-
-                # Prioritize array if it spans further or exists
-                if bracket_start != -1 and bracket_end != -1 and bracket_end > bracket_start:
-                    if brace_start == -1 or bracket_start < brace_start:
-                        try:
-                            data = json.loads(content[bracket_start:bracket_end + 1])
-                        except:
-                            # If array fails, maybe try brace if it exists inside/outside? 
-                            # But usually [ is what we want for List
-                            pass
-
-                if 'data' not in locals():
-                    if brace_start != -1 and brace_end != -1 and brace_end > brace_start:
-                        data = json.loads(content[brace_start:brace_end + 1])
-                    else:
-                        raise ValueError("No JSON structure found in response")
-
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **kwargs
+            )
+            parts = []
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            
+        except Exception as e:
+            logger.error("Groq API error: %s", e)
+            raise
+        
+        if cache_key is not None and parts:
+            self._cache.set(cache_key, "".join(parts))
+    
+    async def chat_completion_stream_async(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1024,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Async variant of chat_completion_stream."""
+        cache_key, cached = self._check_cache(messages, temperature, max_tokens, kwargs)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **kwargs
+            )
+            parts = []
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            
+        except Exception as e:
+            logger.error("Groq API error: %s", e)
+            raise
+        
+        if cache_key is not None and parts:
+            self._cache.set(cache_key, "".join(parts))
+    
+    def _check_cache(
+        self,
+        messages: list[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        kwargs: Dict[str, Any],
+        use_cache: bool = True
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """Return (cache_key, cached_response); the key is None for uncacheable requests."""
+        if not use_cache or temperature > CACHEABLE_TEMPERATURE or _UNCACHEABLE_KWARGS.intersection(kwargs):
+            return None, None
+        
+        cache_key = self._cache.cache_key(self.model, messages, temperature, max_tokens, **kwargs)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info("Groq cache hit")
+        return cache_key, cached
+    
+    def _finish_completion(self, response: Any, cache_key: Optional[str]) -> str:
+        """Extract the response text and cache it when the request was cacheable."""
+        content = response.choices[0].message.content
+        logger.info("Groq API call successful. Tokens used: %s", response.usage.total_tokens)
+        
+        if cache_key is not None and content is not None:
+            self._cache.set(cache_key, content)
+        return content
+    
+    def _parse_task_system_prompt(self, current_time: Optional[str] = None) -> str:
+        """Build the task-parsing system prompt for the user's current time."""
+        time_context = f"Current User Time: {current_time}" if current_time else "Current User Time: Unknown"
+        return _PARSE_TASK_SYS_TEMPLATE.format(time_context=time_context)
+    
+    def _parse_task_messages(self, natural_language: str, current_time: Optional[str]) -> list[Dict[str, str]]:
+        """Build the chat messages for a single task parse."""
+        return [
+            {"role": "system", "content": self._parse_task_system_prompt(current_time)},
+            {"role": "user", "content": natural_language}
+        ]
+    
+    def _parse_task_response(self, response: str) -> List[Dict[str, Any]]:
+        """Decode a task-parse response, normalizing a single object to a list."""
+        try:
+            data = parse_json_from_text(response)
+            
             # Normalize to list
             if isinstance(data, dict):
                 return [data]
@@ -167,9 +526,210 @@ Return ONLY valid JSON."""
                 raise ValueError("Parsed data is neither dict nor list")
 
         except Exception as e:
-            logger.error(f"Failed to parse JSON from Groq response. Error: {str(e)}. Raw response: {response}")
+            logger.error("Failed to parse JSON from Groq response. Error: %s. Raw response: %s", e, response)
             raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
     
+    def parse_task_from_nl(self, natural_language: str, current_time: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Parse task information from natural language.
+        
+        Args:
+            natural_language: Natural language task description
+            current_time: Optional ISO timestamp of the user's current time for reference
+            
+        Returns:
+            List of dictionaries with extracted task fields
+        """
+        messages = self._parse_task_messages(natural_language, current_time)
+        response = self.chat_completion(messages, temperature=0.3)
+        return self._parse_task_response(response)
+    
+    async def parse_task_from_nl_async(
+        self,
+        natural_language: str,
+        current_time: Optional[str] = None,
+        use_cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Async variant of parse_task_from_nl; use_cache=False bypasses the response cache."""
+        messages = self._parse_task_messages(natural_language, current_time)
+        response = await self.chat_completion_async(messages, temperature=0.3, use_cache=use_cache)
+        return self._parse_task_response(response)
+    
+    async def parse_task_stream_async(
+        self,
+        natural_language: str,
+        current_time: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a task parse, yielding each task object as soon as it is complete.
+        
+        Args:
+            natural_language: Natural language task description
+            current_time: Optional ISO timestamp of the user's current time
+            
+        Yields:
+            Extracted task dictionaries, in response order
+            
+        Raises:
+            ValueError: If the response is not valid JSON; tasks yielded before
+                the error remain valid
+        """
+        parser = ArrayItemParser()
+        parts = []
+        yielded = 0
+        stream = self.chat_completion_stream_async(
+            self._parse_task_messages(natural_language, current_time),
+            temperature=0.3
+        )
+        try:
+            async for chunk in stream:
+                parts.append(chunk)
+                for item in parser.feed(chunk):
+                    # Non-objects come from a nested array in a bare-object reply
+                    if isinstance(item, dict):
+                        yielded += 1
+                        yield item
+        except ValueError as e:
+            logger.error("Failed to parse streamed JSON from Groq response. Error: %s", e)
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+        finally:
+            await stream.aclose()
+        
+        if not yielded:
+            # The model answered with a single object rather than an array
+            for item in self._parse_task_response("".join(parts)):
+                yield item
+    
+    def _parse_batch_messages(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str]
+    ) -> list[Dict[str, str]]:
+        """Build the chat messages for a numbered multi-input parse."""
+        numbered = "\n".join(
+            f"{i}. {text}" for i, text in enumerate(natural_language_inputs, 1)
+        )
+        return [
+            {"role": "system", "content": self._parse_task_system_prompt(current_time)},
+            {
+                "role": "user",
+                "content": "Parse each of the following independently and return a JSON array "
+                           "of arrays, one inner array per numbered input, in the same order:\n"
+                           + numbered
+            }
+        ]
+    
+    def _parse_batch_response(self, response: str, expected: int) -> List[List[Dict[str, Any]]]:
+        """Decode a batched parse response into one task list per input."""
+        try:
+            data = parse_json_from_text(response)
+            if not isinstance(data, list) or len(data) != expected:
+                raise ValueError("Expected one result per input")
+            
+            return [[item] if isinstance(item, dict) else item for item in data]
+        
+        except Exception as e:
+            logger.error("Failed to parse batched JSON from Groq response. Error: %s. Raw response: %s", e, response)
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+    
+    def parse_tasks_batch_from_nl(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Parse several independent task descriptions with a single LLM call.
+        
+        Args:
+            natural_language_inputs: Natural language task descriptions
+            current_time: Optional ISO timestamp shared by all inputs
+            
+        Returns:
+            One list of extracted task dictionaries per input, in input order
+        """
+        if len(natural_language_inputs) == 1:
+            return [self.parse_task_from_nl(natural_language_inputs[0], current_time=current_time)]
+        
+        response = self.chat_completion(
+            self._parse_batch_messages(natural_language_inputs, current_time),
+            temperature=0.3,
+            max_tokens=max(1024, 256 * len(natural_language_inputs))
+        )
+        return self._parse_batch_response(response, len(natural_language_inputs))
+    
+    async def parse_tasks_batch_from_nl_async(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Async variant of parse_tasks_batch_from_nl."""
+        if len(natural_language_inputs) == 1:
+            return [await self.parse_task_from_nl_async(natural_language_inputs[0], current_time=current_time)]
+        
+        response = await self.chat_completion_async(
+            self._parse_batch_messages(natural_language_inputs, current_time),
+            temperature=0.3,
+            max_tokens=max(1024, 256 * len(natural_language_inputs))
+        )
+        return self._parse_batch_response(response, len(natural_language_inputs))
+    
+    async def parse_tasks_batch_stream_async(
+        self,
+        natural_language_inputs: List[str],
+        current_time: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Stream a batched parse, yielding each input's tasks as soon as they arrive.
+        
+        Args:
+            natural_language_inputs: Natural language task descriptions
+            current_time: Optional ISO timestamp shared by all inputs
+            
+        Yields:
+            (input index, extracted task dictionaries) pairs, in input order
+            
+        Raises:
+            ValueError: If the response is malformed or has too few results;
+                results yielded before the error remain valid
+        """
+        expected = len(natural_language_inputs)
+        if expected == 1:
+            yield 0, await self.parse_task_from_nl_async(natural_language_inputs[0], current_time=current_time)
+            return
+        
+        parser = ArrayItemParser()
+        received = 0
+        stream = self.chat_completion_stream_async(
+            self._parse_batch_messages(natural_language_inputs, current_time),
+            temperature=0.3,
+            max_tokens=max(1024, 256 * expected)
+        )
+        try:
+            async for chunk in stream:
+                for item in parser.feed(chunk):
+                    if received < expected:
+                        yield received, [item] if isinstance(item, dict) else item
+                    received += 1
+        except ValueError as e:
+            logger.error("Failed to parse streamed batch JSON from Groq response. Error: %s", e)
+            raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
+        finally:
+            await stream.aclose()
+        
+        if received != expected:
+            raise ValueError(f"Expected {expected} results from LLM, got {received}")
+    
+    def _search_filters_response(self, query: str, response: str) -> Dict[str, Any]:
+        """Decode a search-filter response, falling back to a plain text search."""
+        try:
+            filters = parse_json_from_text(response)
+            if not isinstance(filters, dict):
+                raise ValueError("Expected a JSON object")
+            return filters
+        except ValueError:
+            logger.error("Failed to parse JSON from Groq response: %s", response)
+            return {"search_text": query}  # Fallback to text search
+    
     def search_query_to_filters(self, query: str) -> Dict[str, Any]:
         """
         Convert natural language search query to database filters.
@@ -180,49 +740,28 @@ Return ONLY valid JSON."""
         Returns:
             Dictionary with filter parameters
         """
-        system_prompt = """You are a search query parser. Convert natural language queries into database filters.
-
-Return a JSON object with these optional fields:
-- status: "pending" | "in_progress" | "completed"
-- priority: "low" | "medium" | "high"
-- search_text: string (for title/description search)
-- category: string
-
-Examples:
-Input: "Show me all high priority tasks"
-Output: {"priority": "high"}
-
-Input: "What tasks are completed?"
-Output: {"status": "completed"}
-
-Input: "Find tasks about groceries"
-Output: {"search_text": "groceries"}
-
-Only return valid JSON, no additional text."""
-
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": _SEARCH_SYS_PROMPT},
             {"role": "user", "content": query}
         ]
         
         response = self.chat_completion(messages, temperature=0.3)
+        return self._search_filters_response(query, response)
+    
+    async def search_query_to_filters_async(self, query: str, use_cache: bool = True) -> Dict[str, Any]:
+        """Async variant of search_query_to_filters; use_cache=False bypasses the response cache."""
+        messages = [
+            {"role": "system", "content": _SEARCH_SYS_PROMPT},
+            {"role": "user", "content": query}
+        ]
         
-        import json
-        try:
-            start_idx = response.find('{')
-            end_idx = response.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response[start_idx:end_idx]
-                return json.loads(json_str)
-            else:
-                return json.loads(response)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON from Groq response: {response}")
-            return {"search_text": query}  # Fallback to text search
+        response = await self.chat_completion_async(messages, temperature=0.3, use_cache=use_cache)
+        return self._search_filters_response(query, response)
 
 
 # Global instance
 _groq_client: Optional[GroqClient] = None
+_env_loaded = False
 
 
 def get_groq_client() -> GroqClient:
@@ -232,7 +771,11 @@ def get_groq_client() -> GroqClient:
     Returns:
         GroqClient instance
     """
-    global _groq_client
+    global _groq_client, _env_loaded
+    if not _env_loaded:
+        # Load environment variables
+        load_dotenv()
+        _env_loaded = True
     if _groq_client is None:
         _groq_client = GroqClient()
     return _groq_client
@@ -0,0 +1,204 @@
+"""
+JSON helpers for extracting structured data from LLM responses.
+
+Uses orjson when it is installed and falls back to the standard library.
+"""
+from typing import Any, List, Optional, Tuple
+
+try:
+    import orjson as _json
+except ImportError:  # pragma: no cover - optional dependency
+    import json as _json
+
+_OPENERS = {"{": "}", "[": "]"}
+
+
+def loads(data: str) -> Any:
+    """
+    Parse a JSON document.
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    return _json.loads(data)
+
+
+def _find_balanced(text: str, start: int) -> Optional[Tuple[int, int]]:
+    """
+    Find the first balanced JSON object or array at or after start.
+
+    Args:
+        text: Text to scan
+        start: Index to start scanning from
+
+    Returns:
+        (begin, end) slice bounds of the candidate, or None if none is found
+    """
+    length = len(text)
+    while start < length:
+        begin = start
+        while begin < length and text[begin] not in _OPENERS:
+            begin += 1
+        if begin == length:
+            return None
+
+        closers = [_OPENERS[text[begin]]]
+        in_string = False
+        escaped = False
+        i = begin + 1
+        while i < length and closers:
+            char = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char in _OPENERS:
+                closers.append(_OPENERS[char])
+            elif char in "}]":
+                if char != closers.pop():
+                    break
+            i += 1
+
+        if not closers:
+            return begin, i
+
+        # Mismatched or unterminated: retry from the next opening bracket
+        start = begin + 1
+
+    return None
+
+
+def extract_first_json(text: str) -> Optional[str]:
+    """
+    Return the first balanced JSON object or array embedded in text.
+
+    The text is walked once, tracking bracket depth and skipping over
+    string literals so braces inside strings are ignored.
+
+    Args:
+        text: Text that may contain prose or Markdown around the JSON
+
+    Returns:
+        The JSON substring, or None if no balanced value is found
+    """
+    span = _find_balanced(text, 0)
+    return text[span[0]:span[1]] if span else None
+
+
+def parse_json_from_text(text: str) -> Any:
+    """
+    Parse the first valid JSON object or array embedded in text.
+
+    Args:
+        text: Raw LLM response, possibly wrapped in prose or Markdown fences
+
+    Returns:
+        Parsed JSON value
+
+    Raises:
+        ValueError: If no valid JSON object or array is found
+    """
+    try:
+        return loads(text.strip())
+    except ValueError:
+        pass
+
+    position = 0
+    while True:
+        span = _find_balanced(text, position)
+        if span is None:
+            raise ValueError("No JSON structure found in response")
+        try:
+            return loads(text[span[0]:span[1]])
+        except ValueError:
+            position = span[0] + 1
+
+
+class ArrayItemParser:
+    """
+    Incrementally decode the elements of a streamed top-level JSON array.
+
+    Text before the opening bracket (prose, Markdown fences) is skipped, and
+    each element is decoded as soon as it is complete, so callers can act on
+    early elements while the rest of the array is still arriving.
+    """
+
+    def __init__(self):
+        """Initialize an empty parser."""
+        self.done = False
+        self._text = ""
+        self._position = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume the next piece of the stream.
+
+        Args:
+            chunk: Newly received text
+
+        Returns:
+            Elements completed by this chunk, in array order
+
+        Raises:
+            ValueError: If a completed element is not valid JSON
+        """
+        self._text += chunk
+        text = self._text
+        items = []
+
+        for i in range(self._position, len(text)):
+            if self.done:
+                break
+            char = text[i]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                if char == "[":
+                    self._depth = 1
+                continue
+
+            if char in _OPENERS or char == '"':
+                if self._depth == 1 and self._item_start is None:
+                    self._item_start = i
+                if char == '"':
+                    self._in_string = True
+                else:
+                    self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 1 and self._item_start is not None:
+                    # Objects and arrays are emitted on their closing bracket
+                    items.append(loads(text[self._item_start:i + 1]))
+                    self._item_start = None
+                elif self._depth == 0:
+                    if self._item_start is not None:
+                        items.append(loads(text[self._item_start:i].strip()))
+                        self._item_start = None
+                    self.done = True
+            elif self._depth == 1:
+                if char == ",":
+                    if self._item_start is not None:
+                        items.append(loads(text[self._item_start:i].strip()))
+                        self._item_start = None
+                elif self._item_start is None and not char.isspace():
+                    self._item_start = i
+
+        self._position = len(text)
+        return items
@@ -1,14 +1,201 @@
 """
 Parsers for natural language task information.
 """
+import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
-import dateparser
 import re
 
+try:
+    import ahocorasick
+except ImportError:  # pragma: no cover - optional dependency
+    ahocorasick = None
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover - optional dependency
+    fastjsonschema = None
+
 logger = logging.getLogger(__name__)
 
+# dateparser takes ~150ms to import, so it is loaded on first use
+_dateparser = None
+
+# High priority keywords
+_HIGH_PRIORITY_KEYWORDS = (
+    'urgent', 'asap', 'critical', 'important', 'emergency',
+    'high priority', 'crucial', 'vital', 'pressing'
+)
+
+# Low priority keywords
+_LOW_PRIORITY_KEYWORDS = (
+    'low priority', 'whenever', 'someday', 'maybe',
+    'not urgent', 'low', 'minor'
+)
+
+# Category keywords mapping (first matching category wins)
+_CATEGORY_KEYWORDS = {
+    'work': ('work', 'meeting', 'project', 'deadline', 'presentation', 'report', 'email'),
+    'personal': ('personal', 'self', 'health', 'exercise', 'doctor', 'appointment'),
+    'shopping': ('buy', 'purchase', 'shop', 'groceries', 'store', 'order'),
+    'home': ('home', 'house', 'clean', 'repair', 'fix', 'maintenance'),
+    'finance': ('pay', 'bill', 'bank', 'money', 'budget', 'invoice'),
+    'learning': ('learn', 'study', 'read', 'course', 'tutorial', 'practice'),
+    'social': ('call', 'meet', 'visit', 'party', 'event', 'friend', 'family')
+}
+
+# Common tag keywords
+_TAG_KEYWORDS = {
+    'urgent': ('urgent', 'asap', 'emergency'),
+    'important': ('important', 'critical', 'crucial'),
+    'recurring': ('daily', 'weekly', 'monthly', 'recurring'),
+    'quick': ('quick', 'fast', 'brief', '5 minutes', '10 minutes'),
+    'long': ('long', 'extended', 'lengthy')
+}
+
+# Dates starting with YYYY-MM-DD are tried as ISO 8601 first
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# Time expressions and priority words stripped from fallback titles
+_CLEAN_TITLE_RE = re.compile(
+    r'\b(?:tomorrow|today|tonight)\b'
+    r'|\bat\s+\d{1,2}(?::\d{2})?\s*(?:am|pm)?\b'
+    r'|\bby\s+\w+\b'
+    r'|\b(?:urgent|asap|high priority|low priority)\b',
+    re.IGNORECASE
+)
+
+# Common due date phrases: "tomorrow", "at 5pm", "by Friday", "on Monday", "next week"
+# in priority order, so "on monday at 5pm" keeps its time
+_DUE_DATE_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'\b(?:tomorrow|today|tonight)\b',
+    r'\bat\s+\d{1,2}(?::\d{2})?\s*(?:am|pm)?\b',
+    r'\bby\s+\w+',
+    r'\bon\s+\w+',
+    r'\bnext\s+\w+'
+))
+
+# Status words a command can name directly, normalized to the stored value
+_STATUS_WORDS = {
+    'pending': 'pending',
+    'in_progress': 'in_progress',
+    'completed': 'completed',
+    'complete': 'completed',
+    'done': 'completed',
+    'finished': 'completed'
+}
+
+_FILTER_WORD_RE = re.compile(r'in[\s_-]progress|pending|completed|complete|done|finished|high|medium|low', re.IGNORECASE)
+
+# "show me all high priority pending tasks" - nothing but status/priority filters
+_SEARCH_FILTERS_RE = re.compile(
+    r'^\s*(?:show|list|find|get|display)(?:\s+me)?(?:\s+all)?(?:\s+(?:my|the))?'
+    r'(?P<filters>(?:\s+(?:in[\s_-]progress|pending|completed|done|finished|high|medium|low)(?:[\s-]priority)?)*)'
+    r'\s+(?:tasks?|todos?)\s*[.?!]?\s*$',
+    re.IGNORECASE
+)
+
+# "mark the groceries task as done"
+_UPDATE_STATUS_RE = re.compile(
+    r'^\s*(?:mark|set)\s+(?:the\s+)?(?P<task>.+?)(?:\s+task)?\s+(?:as|to)'
+    r'\s+(?P<value>in[\s_-]progress|pending|completed|complete|done|finished)\s*[.!]?\s*$',
+    re.IGNORECASE
+)
+
+# "change the meeting priority to high", "make groceries high priority"
+_UPDATE_PRIORITY_RE = re.compile(
+    r'^\s*(?:set|change|make|mark)\s+(?:the\s+)?(?P<task>.+?)(?:\s+task)?(?:\s+priority)?(?:\s+(?:to|as))?'
+    r'\s+(?P<value>high|medium|low)(?:\s+priority)?\s*[.!]?\s*$',
+    re.IGNORECASE
+)
+
+# Well-formed LLM output; anything else goes through the lenient coercion path
+_TASK_SCHEMA = {
+    "type": "object",
+    "required": ["title"],
+    "properties": {
+        "title": {"type": "string", "minLength": 1},
+        "description": {"type": ["string", "null"]},
+        "priority": {"enum": ["low", "medium", "high"], "default": "medium"},
+        "status": {"enum": ["pending", "in_progress", "completed"]},
+        "category": {"type": ["string", "null"]},
+        "due_date": {"type": ["string", "null"]},
+        "tags": {"type": "array", "items": {"type": "string"}}
+    }
+}
+
+_VALIDATE_TASK = fastjsonschema.compile(_TASK_SCHEMA, use_default=True) if fastjsonschema else None
+
+
+def _build_keyword_table() -> Dict[str, Dict[str, str]]:
+    """Merge the keyword lists into one keyword -> {field: value} table."""
+    table: Dict[str, Dict[str, str]] = {}
+    for keyword in _HIGH_PRIORITY_KEYWORDS:
+        table.setdefault(keyword, {})['priority'] = 'high'
+    for keyword in _LOW_PRIORITY_KEYWORDS:
+        table.setdefault(keyword, {}).setdefault('priority', 'low')
+    for category, keywords in _CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            table.setdefault(keyword, {}).setdefault('category', category)
+    for tag, keywords in _TAG_KEYWORDS.items():
+        for keyword in keywords:
+            table.setdefault(keyword, {}).setdefault('tag', tag)
+    return table
+
+
+# Each keyword appears once, so a text is searched for it once per scan
+_KEYWORD_TABLE = _build_keyword_table()
+
+
+def _build_automaton():
+    """Compile the keyword table into one Aho-Corasick automaton, if available."""
+    if ahocorasick is None:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, values in _KEYWORD_TABLE.items():
+        automaton.add_word(keyword, tuple(values.items()))
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
+
+
+def _scan(text_lower: str) -> Dict[str, Any]:
+    """
+    Find priority, category and tags with a single pass over the keyword table.
+    
+    Args:
+        text_lower: Lowercased text to analyze
+        
+    Returns:
+        Dictionary with "priority", "category" and "tags" keys
+    """
+    hits = set()
+    if _AUTOMATON is not None:
+        for _, values in _AUTOMATON.iter(text_lower):
+            hits.update(values)
+    else:
+        for keyword, values in _KEYWORD_TABLE.items():
+            if keyword in text_lower:
+                hits.update(values.items())
+    
+    # Resolve in keyword-table order: high beats low, first category wins
+    if ('priority', 'high') in hits:
+        priority = 'high'
+    elif ('priority', 'low') in hits:
+        priority = 'low'
+    else:
+        priority = 'medium'
+    
+    category = next((c for c in _CATEGORY_KEYWORDS if ('category', c) in hits), None)
+    tags = [tag for tag in _TAG_KEYWORDS if ('tag', tag) in hits]
+    
+    return {'priority': priority, 'category': category, 'tags': tags}
+
 
 def parse_datetime(text: str, timezone: str = "UTC") -> Optional[str]:
     """
@@ -21,25 +208,50 @@ def parse_datetime(text: str, timezone: str = "UTC") -> Optional[str]:
     Returns:
         ISO 8601 datetime string or None if parsing fails
     """
+    text = text.strip()
+    
+    # Naive ISO 8601 strings (as emitted by the LLM) don't need dateparser
+    if _ISO_DATE_RE.match(text):
+        try:
+            parsed_date = datetime.fromisoformat(text)
+            if parsed_date.tzinfo is None:
+                return parsed_date.isoformat()
+        except ValueError:
+            pass
+    
+    # Relative phrases depend on the clock, so cached results expire every minute
+    text_norm = ' '.join(text.lower().split())
+    return _parse_datetime_cached(text_norm, timezone, int(time.time() // 60))
+
+
+@lru_cache(maxsize=4096)
+def _parse_datetime_cached(text: str, timezone: str, minute: int) -> Optional[str]:
+    """Parse a normalized datetime phrase; minute only partitions the cache."""
+    global _dateparser
     try:
+        if _dateparser is None:
+            import dateparser as _dateparser
+        
         # Use dateparser to handle natural language
-        parsed_date = dateparser.parse(
+        parsed_date = _dateparser.parse(
             text,
+            languages=['en'],
             settings={
                 'TIMEZONE': timezone,
                 'RETURN_AS_TIMEZONE_AWARE': False,
-                'PREFER_DATES_FROM': 'future'
+                'PREFER_DATES_FROM': 'future',
+                'PARSERS': ['relative-time', 'absolute-time']
             }
         )
         
         if parsed_date:
             return parsed_date.isoformat()
         
-        logger.warning(f"Could not parse datetime: {text}")
+        logger.warning("Could not parse datetime: %s", text)
         return None
         
     except Exception as e:
-        logger.error(f"Error parsing datetime '{text}': {str(e)}")
+        logger.error("Error parsing datetime '%s': %s", text, e)
         return None
 
 
@@ -53,29 +265,7 @@ def extract_priority(text: str) -> str:
     Returns:
         Priority level: "low", "medium", or "high"
     """
-    text_lower = text.lower()
-    
-    # High priority keywords
-    high_keywords = [
-        'urgent', 'asap', 'critical', 'important', 'emergency',
-        'high priority', 'crucial', 'vital', 'pressing'
-    ]
-    
-    # Low priority keywords
-    low_keywords = [
-        'low priority', 'whenever', 'someday', 'maybe',
-        'not urgent', 'low', 'minor'
-    ]
-    
-    for keyword in high_keywords:
-        if keyword in text_lower:
-            return "high"
-    
-    for keyword in low_keywords:
-        if keyword in text_lower:
-            return "low"
-    
-    return "medium"
+    return _scan(text.lower())['priority']
 
 
 def infer_category(text: str) -> Optional[str]:
@@ -88,25 +278,7 @@ def infer_category(text: str) -> Optional[str]:
     Returns:
         Inferred category or None
     """
-    text_lower = text.lower()
-    
-    # Category keywords mapping
-    categories = {
-        'work': ['work', 'meeting', 'project', 'deadline', 'presentation', 'report', 'email'],
-        'personal': ['personal', 'self', 'health', 'exercise', 'doctor', 'appointment'],
-        'shopping': ['buy', 'purchase', 'shop', 'groceries', 'store', 'order'],
-        'home': ['home', 'house', 'clean', 'repair', 'fix', 'maintenance'],
-        'finance': ['pay', 'bill', 'bank', 'money', 'budget', 'invoice'],
-        'learning': ['learn', 'study', 'read', 'course', 'tutorial', 'practice'],
-        'social': ['call', 'meet', 'visit', 'party', 'event', 'friend', 'family']
-    }
-    
-    for category, keywords in categories.items():
-        for keyword in keywords:
-            if keyword in text_lower:
-                return category
-    
-    return None
+    return _scan(text.lower())['category']
 
 
 def extract_tags(text: str) -> List[str]:
@@ -119,24 +291,7 @@ def extract_tags(text: str) -> List[str]:
     Returns:
         List of extracted tags
     """
-    tags = []
-    text_lower = text.lower()
-    
-    # Common tag keywords
-    tag_keywords = {
-        'urgent': ['urgent', 'asap', 'emergency'],
-        'important': ['important', 'critical', 'crucial'],
-        'recurring': ['daily', 'weekly', 'monthly', 'recurring'],
-        'quick': ['quick', 'fast', 'brief', '5 minutes', '10 minutes'],
-        'long': ['long', 'extended', 'lengthy']
-    }
-    
-    for tag, keywords in tag_keywords.items():
-        for keyword in keywords:
-            if keyword in text_lower and tag not in tags:
-                tags.append(tag)
-    
-    return tags
+    return _scan(text.lower())['tags']
 
 
 def clean_title(text: str) -> str:
@@ -149,26 +304,73 @@ def clean_title(text: str) -> str:
     Returns:
         Cleaned title
     """
-    # Remove common time expressions
-    time_patterns = [
-        r'\b(tomorrow|today|tonight)\b',
-        r'\bat\s+\d{1,2}(:\d{2})?\s*(am|pm)?\b',
-        r'\bby\s+\w+\b',
-        r'\b(urgent|asap|high priority|low priority)\b'
-    ]
-    
-    cleaned = text
-    for pattern in time_patterns:
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
-    
-    # Clean up extra spaces
+    return _polish_title(_CLEAN_TITLE_RE.sub('', text))
+
+
+def _polish_title(cleaned: str) -> str:
+    """Collapse whitespace and capitalize a title with time phrases removed."""
     cleaned = ' '.join(cleaned.split())
     
     # Capitalize first letter
     if cleaned:
         cleaned = cleaned[0].upper() + cleaned[1:]
     
-    return cleaned.strip()
+    return cleaned
+
+
+def _status_value(word: str) -> str:
+    """Map a status word such as "done" or "in progress" to its stored value."""
+    return _STATUS_WORDS[re.sub(r'[\s-]', '_', word.lower())]
+
+
+def parse_search_filters(query: str) -> Optional[Dict[str, str]]:
+    """
+    Turn a plain "show <status/priority> tasks" query into filters without the LLM.
+    
+    Args:
+        query: Natural language search query
+        
+    Returns:
+        Dictionary with status/priority filters, or None if the query needs the LLM
+    """
+    match = _SEARCH_FILTERS_RE.match(query)
+    if match is None:
+        return None
+    
+    filters: Dict[str, str] = {}
+    for word in _FILTER_WORD_RE.findall(match.group('filters')):
+        word = word.lower()
+        if word in ('high', 'medium', 'low'):
+            field, value = 'priority', word
+        else:
+            field, value = 'status', _status_value(word)
+        
+        # Contradictory filters ("pending completed") are left to the LLM
+        if filters.setdefault(field, value) != value:
+            return None
+    
+    return filters
+
+
+def parse_update_command(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a simple status or priority change without the LLM.
+    
+    Args:
+        text: Natural language update command
+        
+    Returns:
+        Dictionary with task_match and updates, or None if the command needs the LLM
+    """
+    match = _UPDATE_STATUS_RE.match(text)
+    if match is not None:
+        return {"task_match": match.group('task'), "updates": {"status": _status_value(match.group('value'))}}
+    
+    match = _UPDATE_PRIORITY_RE.match(text)
+    if match is not None:
+        return {"task_match": match.group('task'), "updates": {"priority": match.group('value').lower()}}
+    
+    return None
 
 
 def parse_task_metadata(text: str) -> Dict[str, Any]:
@@ -183,25 +385,18 @@ def parse_task_metadata(text: str) -> Dict[str, Any]:
     Returns:
         Dictionary with extracted metadata
     """
+    # Lowercase and scan keywords once for every field
+    scan = _scan(text.lower())
     metadata = {
-        'title': clean_title(text),
-        'priority': extract_priority(text),
-        'category': infer_category(text),
-        'tags': extract_tags(text)
+        'title': _polish_title(_CLEAN_TITLE_RE.sub('', text)),
+        'priority': scan['priority'],
+        'category': scan['category'],
+        'tags': scan['tags']
     }
     
-    # Try to extract due date
-    # Common patterns: "tomorrow", "at 5pm", "by Friday"
-    due_date_patterns = [
-        r'(tomorrow|today|tonight)',
-        r'at\s+(\d{1,2}(:\d{2})?\s*(am|pm)?)',
-        r'by\s+(\w+)',
-        r'on\s+(\w+)',
-        r'next\s+(\w+)'
-    ]
-    
-    for pattern in due_date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    # Try to extract due date from the first candidate phrase that parses
+    for pattern in _DUE_DATE_PATTERNS:
+        match = pattern.search(text)
         if match:
             due_date = parse_datetime(match.group(0))
             if due_date:
@@ -221,6 +416,33 @@ def validate_task_data(task_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Validated task data
     """
+    if _VALIDATE_TASK is not None:
+        try:
+            # Copy so schema defaults are not written into the caller's dict
+            data = _VALIDATE_TASK(dict(task_data))
+        except (fastjsonschema.JsonSchemaException, TypeError):
+            data = None
+        
+        if data is not None:
+            validated = {'title': data['title'].strip()}
+            if data.get('description'):
+                validated['description'] = data['description'].strip()
+            validated['priority'] = data['priority']
+            if 'status' in data:
+                validated['status'] = data['status']
+            if data.get('category'):
+                validated['category'] = data['category'].strip()
+            if data.get('due_date'):
+                validated['due_date'] = data['due_date'].split('/')[0]
+            if 'tags' in data:
+                validated['tags'] = [tag.strip() for tag in data['tags'] if tag]
+            return validated
+    
+    return _coerce_task_data(task_data)
+
+
+def _coerce_task_data(task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate loosely-typed task data, coercing values where possible."""
     validated = {}
     
     # Required field
@@ -233,12 +455,8 @@ def validate_task_data(task_data: Dict[str, Any]) -> Dict[str, Any]:
     if 'description' in task_data and task_data['description']:
         validated['description'] = str(task_data['description']).strip()
     
-    if 'priority' in task_data:
-        priority = str(task_data['priority']).lower()
-        if priority in ['low', 'medium', 'high']:
-            validated['priority'] = priority
-        else:
-            validated['priority'] = 'medium'
+    priority = str(task_data.get('priority', 'medium')).lower()
+    validated['priority'] = priority if priority in ['low', 'medium', 'high'] else 'medium'
     
     if 'status' in task_data:
         status = str(task_data['status']).lower()
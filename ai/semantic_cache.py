@@ -0,0 +1,379 @@
+"""
+Semantic cache for natural language parses.
+
+Stores LLM outputs alongside sentence embeddings of the input text so that
+differently phrased requests with the same intent ("buy milk tomorrow" vs
+"get milk tomorrow") can reuse a previous parse instead of calling the LLM.
+
+Inputs seen before (up to whitespace) are answered from an exact-match tier
+without embedding. The similarity tier requires the optional numpy and
+sentence-transformers packages; when they are missing only exact repeats hit. Large caches use a
+FAISS IVF index for lookups when faiss is installed. With CACHE_DB_PATH set,
+entries are written through to SQLite and picked up by other processes.
+"""
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import logging
+import threading
+import importlib.util
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import faiss
+except ImportError:  # pragma: no cover - optional dependency
+    faiss = None
+
+from ai.cache_db import connect_cache_db
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384
+DEFAULT_THRESHOLD = 0.92
+
+# FAISS settings: below INDEX_MIN_ENTRIES a brute-force matrix product is faster
+INDEX_MIN_ENTRIES = 4096
+INDEX_REBUILD_EVERY = 1024
+INDEX_NLIST = 64
+INDEX_NPROBE = 8
+INDEX_CANDIDATES = 16
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def _get_encoder():
+    """Load the sentence-transformer model once per process."""
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                from sentence_transformers import SentenceTransformer
+                _encoder = SentenceTransformer(EMBEDDING_MODEL)
+                logger.info("Loaded embedding model: %s", EMBEDDING_MODEL)
+    return _encoder
+
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace so trivially different inputs share an exact-match key."""
+    return " ".join(text.split())
+
+
+def semantic_cache_available() -> bool:
+    """Check whether the optional embedding dependencies are installed."""
+    return np is not None and importlib.util.find_spec("sentence_transformers") is not None
+
+
+class SemanticCache:
+    """Cosine-similarity cache of JSON-serializable payloads for one namespace."""
+
+    def __init__(
+        self,
+        namespace: str,
+        threshold: float = DEFAULT_THRESHOLD,
+        maxsize: int = 4096,
+        ttl: float = 86400.0,
+        db_path: Optional[str] = None,
+        index_min_entries: int = INDEX_MIN_ENTRIES
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            namespace: Cache name; entries are never shared across namespaces
+            threshold: Minimum cosine similarity for a hit
+            maxsize: Maximum number of entries before LRU eviction
+            ttl: Seconds an entry stays valid
+            db_path: SQLite file shared across processes (default: CACHE_DB_PATH env var)
+            index_min_entries: Entry count at which lookups switch to a FAISS index
+        """
+        self.namespace = namespace
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.enabled = semantic_cache_available()
+        self.stats = {"hits": 0, "misses": 0}
+
+        self._lock = threading.Lock()
+        # Exact tier: (context, normalized text) -> (stored_at, payload JSON, similarity slot)
+        self._exact: "OrderedDict[Tuple[Optional[str], str], Tuple[float, str, Optional[int]]]" = OrderedDict()
+        self._payloads: List[str] = []
+        self._contexts: List[Optional[str]] = []
+        self._recent_embeddings: "OrderedDict[str, Any]" = OrderedDict()
+        if self.enabled:
+            self._embeddings = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+            self._context_ids = np.empty(0, dtype=np.int32)
+            self._stored_at = np.empty(0, dtype=np.float64)
+            self._last_used = np.empty(0, dtype=np.float64)
+        self._context_index: Dict[Optional[str], int] = {}
+
+        # Slots written since the FAISS index was built are scanned exactly
+        self.index_min_entries = index_min_entries
+        self._index = None
+        self._delta: Set[int] = set()
+
+        # Rows written by this process are already in memory and skipped on sync
+        db_path = db_path or os.getenv("CACHE_DB_PATH")
+        self._db = connect_cache_db(db_path) if self.enabled and db_path else None
+        self._last_rowid = 0
+        self._own_rowids: Set[int] = set()
+        if self._db is not None:
+            with self._lock:
+                self._prune()
+                self._sync()
+            logger.info("Loaded %s semantic cache entries (%s)", len(self._payloads), self.namespace)
+
+    def _encode(self, text: str):
+        """Embed text as an L2-normalized float32 vector, memoizing recent inputs."""
+        with self._lock:
+            embedding = self._recent_embeddings.get(text)
+            if embedding is not None:
+                return embedding
+
+        embedding = _get_encoder().encode(text, normalize_embeddings=True).astype(np.float32)
+
+        with self._lock:
+            self._recent_embeddings[text] = embedding
+            while len(self._recent_embeddings) > 64:
+                self._recent_embeddings.popitem(last=False)
+        return embedding
+
+    def _context_id(self, context: Optional[str]) -> int:
+        """Map a context string to a small integer for vectorized filtering."""
+        if context not in self._context_index:
+            self._context_index[context] = len(self._context_index)
+        return self._context_index[context]
+
+    def get(self, text: str, context: Optional[str] = None) -> Optional[Any]:
+        """
+        Look up the payload cached for the most similar text.
+
+        Args:
+            text: Natural language input
+            context: Extra key that must match exactly (e.g. the user's current time)
+
+        Returns:
+            A fresh copy of the cached payload, or None on a miss
+        """
+        payload = self._get_exact(text, context)
+        if payload is not None:
+            return payload
+        if not self.enabled:
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            embedding = self._encode(text)
+        except Exception as e:
+            logger.warning("Semantic cache disabled, embedding failed: %s", e)
+            self.enabled = False
+            return None
+
+        with self._lock:
+            if self._db is not None:
+                self._sync()
+            
+            if not self._payloads or context not in self._context_index:
+                self.stats["misses"] += 1
+                return None
+
+            rows = self._candidate_rows(embedding)
+            if rows is None:
+                sims = self._embeddings @ embedding
+                sims[self._context_ids != self._context_index[context]] = -1.0
+            else:
+                sims = np.full(len(self._payloads), -1.0, dtype=np.float32)
+                sims[rows] = self._embeddings[rows] @ embedding
+                sims[self._context_ids != self._context_index[context]] = -1.0
+            best = int(sims.argmax())
+            now = time.time()
+
+            if sims[best] < self.threshold or now - self._stored_at[best] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+
+            self._last_used[best] = now
+            self.stats["hits"] += 1
+            logger.info("Semantic cache hit (%s, similarity %.3f)", self.namespace, sims[best])
+            return json.loads(self._payloads[best])
+
+    def set(self, text: str, payload: Any, context: Optional[str] = None) -> None:
+        """
+        Cache a payload for the given text.
+
+        Args:
+            text: Natural language input
+            payload: JSON-serializable value to return on future hits
+            context: Extra key that must match exactly on lookup
+        """
+        payload_json = json.dumps(payload)
+        stored_at = time.time()
+        embedding = None
+        if self.enabled:
+            try:
+                embedding = self._encode(text)
+            except Exception as e:
+                logger.warning("Semantic cache disabled, embedding failed: %s", e)
+                self.enabled = False
+
+        with self._lock:
+            slot = None
+            if embedding is not None:
+                slot = self._insert(embedding, payload_json, context, stored_at)
+                if self._db is not None:
+                    self._persist(embedding, payload_json, context, stored_at)
+
+            key = (context, _normalize(text))
+            self._exact[key] = (stored_at, payload_json, slot)
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.maxsize:
+                self._exact.popitem(last=False)
+
+    def _get_exact(self, text: str, context: Optional[str]) -> Optional[Any]:
+        """Return a copy of the payload stored for this exact input, or None."""
+        key = (context, _normalize(text))
+        with self._lock:
+            entry = self._exact.get(key)
+            if entry is None:
+                return None
+            stored_at, payload_json, slot = entry
+            now = time.time()
+            if now - stored_at > self.ttl:
+                del self._exact[key]
+                return None
+            self._exact.move_to_end(key)
+            # Keep the similarity tier's LRU in step while the slot still holds this entry
+            if slot is not None and slot < len(self._payloads) and self._payloads[slot] is payload_json:
+                self._last_used[slot] = now
+            self.stats["hits"] += 1
+        return json.loads(payload_json)
+
+    def _candidate_rows(self, embedding):
+        """
+        Narrow a lookup to likely rows using the FAISS index.
+
+        Args:
+            embedding: Normalized query embedding
+
+        Returns:
+            Row indices to score exactly, or None to score every row
+        """
+        if self._index is None:
+            return None
+
+        _, ids = self._index.search(embedding[None, :], INDEX_CANDIDATES)
+        rows = {int(i) for i in ids[0] if i >= 0 and int(i) not in self._delta}
+        rows.update(self._delta)
+        return np.fromiter(rows, dtype=np.int64, count=len(rows))
+
+    def _build_index(self) -> None:
+        """(Re)build the FAISS IVF index over all rows; caller holds the lock."""
+        quantizer = faiss.IndexFlatIP(EMBEDDING_DIM)
+        index = faiss.IndexIVFFlat(quantizer, EMBEDDING_DIM, INDEX_NLIST, faiss.METRIC_INNER_PRODUCT)
+        index.train(self._embeddings)
+        index.add(self._embeddings)
+        index.nprobe = INDEX_NPROBE
+        # The IVF index only borrows the quantizer
+        self._quantizer = quantizer
+        self._index = index
+        self._delta = set()
+        logger.info("Built semantic cache index over %s entries (%s)", len(self._payloads), self.namespace)
+
+    async def aget(self, text: str, context: Optional[str] = None) -> Optional[Any]:
+        """Async variant of get; embedding runs in a worker thread."""
+        payload = self._get_exact(text, context)
+        if payload is not None or not self.enabled:
+            return payload
+        return await asyncio.to_thread(self.get, text, context)
+
+    async def aset(self, text: str, payload: Any, context: Optional[str] = None) -> None:
+        """Async variant of set; embedding runs in a worker thread."""
+        if not self.enabled:
+            self.set(text, payload, context)
+            return
+        await asyncio.to_thread(self.set, text, payload, context)
+
+    def _insert(self, embedding, payload: str, context: Optional[str], stored_at: float) -> int:
+        """
+        Append an entry, overwriting the stalest slot once the cache is full; caller holds the lock.
+
+        Returns:
+            Slot the entry was written to
+        """
+        context_id = self._context_id(context)
+
+        if len(self._payloads) < self.maxsize:
+            self._embeddings = np.vstack([self._embeddings, embedding[None, :]])
+            self._context_ids = np.append(self._context_ids, np.int32(context_id))
+            self._stored_at = np.append(self._stored_at, stored_at)
+            self._last_used = np.append(self._last_used, stored_at)
+            self._payloads.append(payload)
+            self._contexts.append(context)
+            slot = len(self._payloads) - 1
+        else:
+            # Expired entries go first, otherwise the least recently used one
+            expired = np.flatnonzero(stored_at - self._stored_at > self.ttl)
+            slot = int(expired[0]) if expired.size else int(self._last_used.argmin())
+            self._embeddings[slot] = embedding
+            self._context_ids[slot] = context_id
+            self._stored_at[slot] = stored_at
+            self._last_used[slot] = stored_at
+            self._payloads[slot] = payload
+            self._contexts[slot] = context
+
+        if faiss is None or len(self._payloads) < self.index_min_entries:
+            return slot
+        self._delta.add(slot)
+        if self._index is None or len(self._delta) >= INDEX_REBUILD_EVERY:
+            self._build_index()
+        return slot
+
+    def _persist(self, embedding, payload: str, context: Optional[str], stored_at: float) -> None:
+        """Write an entry through to SQLite; caller holds the lock."""
+        try:
+            cursor = self._db.execute(
+                "INSERT INTO semantic_cache (namespace, context, embedding, payload, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, context, embedding.astype(np.float32).tobytes(), payload, stored_at)
+            )
+            self._own_rowids.add(cursor.lastrowid)
+        except sqlite3.Error as e:
+            logger.warning("Could not persist semantic cache entry (%s): %s", self.namespace, e)
+
+    def _sync(self) -> None:
+        """Load unexpired entries added since the last sync, by any process; caller holds the lock."""
+        try:
+            rows = self._db.execute(
+                "SELECT rowid, context, embedding, payload, stored_at FROM semantic_cache "
+                "WHERE namespace = ? AND rowid > ? AND stored_at > ? ORDER BY rowid",
+                (self.namespace, self._last_rowid, time.time() - self.ttl)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("Could not read semantic cache (%s): %s", self.namespace, e)
+            return
+
+        for rowid, context, embedding, payload, stored_at in rows:
+            self._last_rowid = rowid
+            if rowid in self._own_rowids:
+                self._own_rowids.discard(rowid)
+                continue
+            self._insert(np.frombuffer(embedding, dtype=np.float32), payload, context, stored_at)
+
+    def _prune(self) -> None:
+        """Delete expired rows from SQLite; caller holds the lock."""
+        try:
+            self._db.execute(
+                "DELETE FROM semantic_cache WHERE namespace = ? AND stored_at <= ?",
+                (self.namespace, time.time() - self.ttl)
+            )
+        except sqlite3.Error as e:
+            logger.warning("Could not prune semantic cache (%s): %s", self.namespace, e)
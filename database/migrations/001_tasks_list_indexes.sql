@@ -0,0 +1,13 @@
+-- Indexes for SupabaseClient.list_tasks, which filters on user_id and/or
+-- status and orders by created_at DESC. Postgres can then read the newest
+-- rows straight from the index instead of sorting the whole table.
+--
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block; run each
+-- statement on its own (e.g. in the Supabase SQL editor).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tasks_user_status_created_idx
+    ON tasks (user_id, status, created_at DESC);
+
+-- The REST API and MCP tools list by status without a user_id
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tasks_status_created_idx
+    ON tasks (status, created_at DESC);
@@ -0,0 +1,13 @@
+-- Full-text search for SupabaseClient.search_tasks. A generated tsvector over
+-- title and description, backed by a GIN index, replaces the two
+-- unindexable '%query%' ILIKE scans. SupabaseClient selects explicit columns
+-- (and strips fts from write responses), so the vector never leaves the server.
+
+ALTER TABLE tasks
+    ADD COLUMN IF NOT EXISTS fts tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))
+    ) STORED;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tasks_fts_idx
+    ON tasks USING GIN (fts);
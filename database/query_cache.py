@@ -0,0 +1,74 @@
+"""
+In-process cache for database read queries.
+"""
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Tuple
+
+
+# Returned by QueryCache.get on a miss, since None is a valid cached result
+MISSING = object()
+
+
+class QueryCache:
+    """TTL + LRU cache of query results, cleared whenever the data changes."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of query results to keep
+            ttl: Seconds a cached result stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Hashable description of the query
+
+        Returns:
+            A deep copy of the cached result, or MISSING
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            entry = None
+
+        if entry is None:
+            self.stats["misses"] += 1
+            return MISSING
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        """
+        Store a result unless the data changed while it was being fetched.
+
+        Args:
+            key: Hashable description of the query
+            value: Query result
+            generation: Value of self.generation when the query started
+        """
+        if generation != self.generation:
+            return
+
+        self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop all cached results after a write."""
+        self.generation += 1
+        self._entries.clear()
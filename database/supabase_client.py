@@ -2,12 +2,24 @@
 Supabase database client for task management.
 """
 import os
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import copy
+import json
+import asyncio
+import importlib.util
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Hashable, Tuple
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from supabase import create_client, Client
+import httpx
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
 import logging
 
+from database.query_cache import QueryCache, MISSING
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
 # Load environment variables
 load_dotenv()
 
@@ -15,22 +27,227 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Columns returned to callers: everything on the Task model. The generated
+# fts search vector (database/migrations/002_tasks_fts.sql) is only used for
+# filtering and would otherwise ride along in every row.
+_TASK_COLUMNS = "id,user_id,title,description,status,priority,category,due_date,tags,metadata,created_at,updated_at"
+
+
+def _without_fts(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop the fts column from rows returned by a write.
+    
+    Inserts and updates return the whole row (there is no column list for
+    Prefer: return=representation in the SDK), so strip it here.
+    
+    Args:
+        rows: Rows from PostgREST
+        
+    Returns:
+        The same rows, without fts
+    """
+    for row in rows:
+        row.pop("fts", None)
+    return rows
+
 
 class SupabaseClient:
     """Supabase database client for task operations."""
     
     def __init__(self):
-        """Initialize Supabase client."""
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
+        """Initialize Supabase client configuration; the connection is created on first use."""
+        self._url = os.getenv("SUPABASE_URL")
+        self._key = os.getenv("SUPABASE_KEY")
         
-        if not supabase_url or not supabase_key:
+        if not self._url or not self._key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         
-        self.client: Client = create_client(supabase_url, supabase_key)
-        logger.info("Supabase client initialized successfully")
+        # Connection pool bounds, shared by the PostgREST HTTP pool and the asyncpg pool
+        self._pool_min = int(os.getenv("DB_POOL_MIN", "2"))
+        self._pool_max = int(os.getenv("DB_POOL_MAX", "20"))
+        
+        self.client: Optional[AsyncClient] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._init_lock = asyncio.Lock()
+        self._cache = QueryCache()
+        # In-flight query key -> [task, number of callers awaiting it]
+        self._inflight: Dict[Hashable, List[Any]] = {}
+        
+        # Optional direct Postgres pool for hot reads, bypassing PostgREST
+        self._dsn: Optional[str] = None
+        self._pool = None
+        if os.getenv("USE_ASYNCPG") == "1":
+            if asyncpg is None or not os.getenv("DATABASE_URL"):
+                logger.warning("USE_ASYNCPG=1 needs asyncpg installed and DATABASE_URL set; using PostgREST")
+            else:
+                self._dsn = os.getenv("DATABASE_URL")
+    
+    async def init(self) -> AsyncClient:
+        """
+        Create the async Supabase client once, even under concurrent first calls.
+        
+        Returns:
+            Initialized AsyncClient
+        """
+        if self.client is None:
+            async with self._init_lock:
+                if self.client is None:
+                    # Bounded pool of warm connections shared by all PostgREST requests
+                    self._http_client = httpx.AsyncClient(
+                        http2=importlib.util.find_spec("h2") is not None,
+                        limits=httpx.Limits(
+                            max_connections=self._pool_max,
+                            max_keepalive_connections=self._pool_max,
+                            keepalive_expiry=60
+                        ),
+                        timeout=httpx.Timeout(10.0, connect=2.0)
+                    )
+                    self.client = await acreate_client(
+                        self._url,
+                        self._key,
+                        options=AsyncClientOptions(httpx_client=self._http_client)
+                    )
+                    if self._dsn:
+                        # statement_cache_size=0: Supabase's pooler cannot reuse
+                        # prepared statements across transactions
+                        self._pool = await asyncpg.create_pool(
+                            self._dsn,
+                            min_size=self._pool_min,
+                            max_size=self._pool_max,
+                            max_inactive_connection_lifetime=1800,
+                            statement_cache_size=0
+                        )
+                    logger.info("Supabase client initialized successfully")
+        return self.client
+    
+    async def aclose(self) -> None:
+        """Close pooled connections; the client is recreated on next use."""
+        async with self._init_lock:
+            if self._http_client is not None:
+                await self._http_client.aclose()
+            if self._pool is not None:
+                await self._pool.close()
+            self._http_client = None
+            self._pool = None
+            self.client = None
+    
+    async def _read(
+        self,
+        key: Hashable,
+        nocache: bool,
+        fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Serve a read query from the cache, running it on a miss.
+        
+        Args:
+            key: Hashable description of the query
+            nocache: Bypass the cached result (the fresh one is still stored)
+            fetch: Coroutine function that runs the query
+            
+        Returns:
+            Query result
+        """
+        if not nocache:
+            cached = self._cache.get(key)
+            if cached is not MISSING:
+                return cached
+        
+        generation = self._cache.generation
+        result = await self._coalesce(key, fetch)
+        self._cache.set(key, result, generation)
+        return result
+    
+    async def _coalesce(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Share one in-flight query between concurrent identical calls.
+        
+        The query is cancelled once every caller waiting on it has been
+        cancelled, so abandoned speculative reads stop hitting the database.
+        
+        Args:
+            key: Hashable description of the query
+            fetch: Coroutine function that runs the query
+            
+        Returns:
+            Query result (a private copy for callers that joined late)
+        """
+        # A write bumps the generation, so later callers never join a stale read
+        inflight_key = (key, self._cache.generation)
+        entry = self._inflight.get(inflight_key)
+        joined = entry is not None
+        if entry is None:
+            task = asyncio.ensure_future(fetch())
+            entry = self._inflight[inflight_key] = [task, 0]
+            
+            def done(finished: asyncio.Task) -> None:
+                if self._inflight.get(inflight_key) is entry:
+                    del self._inflight[inflight_key]
+                # Mark a failure as retrieved even if every waiter has left
+                if not finished.cancelled():
+                    finished.exception()
+            
+            task.add_done_callback(done)
+        
+        task = entry[0]
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Every caller was cancelled; nobody will read the result
+                task.cancel()
+        return copy.deepcopy(result) if joined else result
+    
+    @staticmethod
+    def _where(**filters: Optional[str]) -> Tuple[str, List[Any]]:
+        """
+        Build a parameterized WHERE clause from the filters that are set.
+        
+        Args:
+            **filters: Column name to value; empty values are skipped
+            
+        Returns:
+            (SQL clause or "", positional arguments)
+        """
+        clauses: List[str] = []
+        args: List[Any] = []
+        for column, value in filters.items():
+            if value:
+                args.append(value)
+                clauses.append(f"{column} = ${len(args)}")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
     
-    def create_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _fast_list_tasks(
+        self,
+        user_id: Optional[str],
+        status: Optional[str],
+        priority: Optional[str],
+        limit: int,
+        offset: int
+    ) -> List[Dict[str, Any]]:
+        """list_tasks over the asyncpg pool, returning rows shaped like PostgREST's."""
+        where, args = self._where(user_id=user_id, status=status, priority=priority)
+        n = len(args)
+        # json_agg serializes rows the same way PostgREST does (ISO timestamps, string UUIDs)
+        sql = (
+            "SELECT coalesce(json_agg(t), '[]') FROM ("
+            f"SELECT {_TASK_COLUMNS} FROM tasks{where} ORDER BY created_at DESC LIMIT ${n + 1} OFFSET ${n + 2}"
+            ") t"
+        )
+        async with self._pool.acquire() as conn:
+            rows = json.loads(await conn.fetchval(sql, *args, limit, offset))
+        logger.info("Retrieved %s tasks", len(rows))
+        return rows
+    
+    async def _fast_task_count(self, user_id: Optional[str], status: Optional[str]) -> int:
+        """get_task_count over the asyncpg pool."""
+        where, args = self._where(user_id=user_id, status=status)
+        async with self._pool.acquire() as conn:
+            return await conn.fetchval(f"SELECT count(*) FROM tasks{where}", *args)
+    
+    async def create_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Create a new task in the database.
         
@@ -41,42 +258,80 @@ class SupabaseClient:
             Created task data
         """
         try:
+            client = await self.init()
             # Ensure updated_at is set
-            task_data["updated_at"] = datetime.utcnow().isoformat()
+            task_data["updated_at"] = datetime.now(timezone.utc).isoformat()
             
-            response = self.client.table("tasks").insert(task_data).execute()
-            logger.info(f"Task created successfully: {response.data[0]['id']}")
-            return response.data[0]
+            response = await client.table("tasks").insert(task_data).execute()
+            self._cache.invalidate()
+            created = _without_fts(response.data)[0]
+            logger.info("Task created successfully: %s", created["id"])
+            return created
         except Exception as e:
-            logger.error(f"Error creating task: {str(e)}")
+            logger.error("Error creating task: %s", e)
             raise
     
-    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+    async def create_tasks(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Get a single task by ID.
+        Create several tasks with a single multi-row insert.
         
         Args:
-            task_id: UUID of the task
+            tasks: List of dictionaries containing task fields
             
         Returns:
-            Task data or None if not found
+            Created task data, in input order
         """
+        if not tasks:
+            return []
+        
         try:
-            response = self.client.table("tasks").select("*").eq("id", task_id).execute()
-            if response.data:
-                return response.data[0]
-            return None
+            client = await self.init()
+            # One timestamp for the whole batch
+            now = datetime.now(timezone.utc).isoformat()
+            rows = [{**task_data, "updated_at": now} for task_data in tasks]
+            
+            # Rows carry different optional keys; let missing ones take the
+            # column default instead of NULL (Prefer: missing=default)
+            response = await client.table("tasks").insert(rows, default_to_null=False).execute()
+            self._cache.invalidate()
+            logger.info("Created %s tasks in one insert", len(response.data))
+            return _without_fts(response.data)
         except Exception as e:
-            logger.error(f"Error fetching task {task_id}: {str(e)}")
+            logger.error("Error creating %s tasks: %s", len(tasks), e)
             raise
     
-    def list_tasks(
+    async def get_task(self, task_id: str, nocache: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get a single task by ID.
+        
+        Args:
+            task_id: UUID of the task
+            nocache: Skip the query cache
+            
+        Returns:
+            Task data or None if not found
+        """
+        async def fetch():
+            try:
+                client = await self.init()
+                response = await client.table("tasks").select(_TASK_COLUMNS).eq("id", task_id).execute()
+                if response.data:
+                    return response.data[0]
+                return None
+            except Exception as e:
+                logger.error("Error fetching task %s: %s", task_id, e)
+                raise
+        
+        return await self._read(("get_task", task_id), nocache, fetch)
+    
+    async def list_tasks(
         self,
         user_id: Optional[str] = None,
         status: Optional[str] = None,
         priority: Optional[str] = None,
         limit: int = 100,
-        offset: int = 0
+        offset: int = 0,
+        nocache: bool = False
     ) -> List[Dict[str, Any]]:
         """
         List tasks with optional filters.
@@ -87,32 +342,40 @@ class SupabaseClient:
             priority: Filter by priority (low, medium, high)
             limit: Maximum number of tasks to return
             offset: Number of tasks to skip
+            nocache: Skip the query cache
             
         Returns:
             List of task data
         """
-        try:
-            query = self.client.table("tasks").select("*")
-            
-            if user_id:
-                query = query.eq("user_id", user_id)
-            if status:
-                query = query.eq("status", status)
-            if priority:
-                query = query.eq("priority", priority)
-            
-            # Order by created_at descending (newest first)
-            query = query.order("created_at", desc=True)
-            query = query.limit(limit).offset(offset)
-            
-            response = query.execute()
-            logger.info(f"Retrieved {len(response.data)} tasks")
-            return response.data
-        except Exception as e:
-            logger.error(f"Error listing tasks: {str(e)}")
-            raise
+        async def fetch():
+            try:
+                client = await self.init()
+                if self._pool is not None:
+                    return await self._fast_list_tasks(user_id, status, priority, limit, offset)
+                
+                query = client.table("tasks").select(_TASK_COLUMNS)
+                
+                if user_id:
+                    query = query.eq("user_id", user_id)
+                if status:
+                    query = query.eq("status", status)
+                if priority:
+                    query = query.eq("priority", priority)
+                
+                # Order by created_at descending (newest first)
+                query = query.order("created_at", desc=True)
+                query = query.limit(limit).offset(offset)
+                
+                response = await query.execute()
+                logger.info("Retrieved %s tasks", len(response.data))
+                return response.data
+            except Exception as e:
+                logger.error("Error listing tasks: %s", e)
+                raise
+        
+        return await self._read(("list_tasks", user_id, status, priority, limit, offset), nocache, fetch)
     
-    def update_task(self, task_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+    async def update_task(self, task_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """
         Update an existing task.
         
@@ -124,11 +387,12 @@ class SupabaseClient:
             Updated task data
         """
         try:
+            client = await self.init()
             # Always update the updated_at timestamp
-            updates["updated_at"] = datetime.utcnow().isoformat()
+            updates["updated_at"] = datetime.now(timezone.utc).isoformat()
             
-            response = (
-                self.client.table("tasks")
+            response = await (
+                client.table("tasks")
                 .update(updates)
                 .eq("id", task_id)
                 .execute()
@@ -137,13 +401,14 @@ class SupabaseClient:
             if not response.data:
                 raise ValueError(f"Task {task_id} not found")
             
-            logger.info(f"Task {task_id} updated successfully")
-            return response.data[0]
+            self._cache.invalidate()
+            logger.info("Task %s updated successfully", task_id)
+            return _without_fts(response.data)[0]
         except Exception as e:
-            logger.error(f"Error updating task {task_id}: {str(e)}")
+            logger.error("Error updating task %s: %s", task_id, e)
             raise
     
-    def delete_task(self, task_id: str) -> bool:
+    async def delete_task(self, task_id: str) -> bool:
         """
         Delete a task.
         
@@ -154,66 +419,100 @@ class SupabaseClient:
             True if deleted successfully
         """
         try:
-            response = self.client.table("tasks").delete().eq("id", task_id).execute()
-            logger.info(f"Task {task_id} deleted successfully")
+            client = await self.init()
+            response = await client.table("tasks").delete().eq("id", task_id).execute()
+            self._cache.invalidate()
+            logger.info("Task %s deleted successfully", task_id)
             return True
         except Exception as e:
-            logger.error(f"Error deleting task {task_id}: {str(e)}")
+            logger.error("Error deleting task %s: %s", task_id, e)
             raise
     
-    def search_tasks(self, query: str, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def search_tasks(
+        self,
+        query: str,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Search tasks by title or description.
+        Search tasks by title or description using Postgres full-text search.
         
         Args:
             query: Search query string
             user_id: Optional user ID filter
+            status: Optional status filter
+            priority: Optional priority filter
             
         Returns:
             List of matching tasks
         """
-        try:
-            # Use ilike for case-insensitive search
-            db_query = self.client.table("tasks").select("*")
-            
-            if user_id:
-                db_query = db_query.eq("user_id", user_id)
-            
-            # Search in title or description
-            db_query = db_query.or_(f"title.ilike.%{query}%,description.ilike.%{query}%")
-            
-            response = db_query.execute()
-            logger.info(f"Search found {len(response.data)} tasks")
-            return response.data
-        except Exception as e:
-            logger.error(f"Error searching tasks: {str(e)}")
-            raise
+        async def fetch():
+            try:
+                client = await self.init()
+                db_query = client.table("tasks").select(_TASK_COLUMNS)
+                
+                # text_search ends the filter chain, so apply these first
+                if user_id:
+                    db_query = db_query.eq("user_id", user_id)
+                if status:
+                    db_query = db_query.eq("status", status)
+                if priority:
+                    db_query = db_query.eq("priority", priority)
+                
+                # Full-text search over title and description (GIN-indexed
+                # generated column, see database/migrations/002_tasks_fts.sql).
+                # websearch syntax accepts free-form user input.
+                response = await db_query.text_search(
+                    "fts", query, options={"type": "web_search", "config": "english"}
+                ).execute()
+                logger.info("Search found %s tasks", len(response.data))
+                return response.data
+            except Exception as e:
+                logger.error("Error searching tasks: %s", e)
+                raise
+        
+        return await self._coalesce(("search_tasks", query, user_id, status, priority), fetch)
     
-    def get_task_count(self, user_id: Optional[str] = None, status: Optional[str] = None) -> int:
+    async def get_task_count(
+        self,
+        user_id: Optional[str] = None,
+        status: Optional[str] = None,
+        nocache: bool = False
+    ) -> int:
         """
         Get count of tasks matching filters.
         
         Args:
             user_id: Optional user ID filter
             status: Optional status filter
+            nocache: Skip the query cache
             
         Returns:
             Count of matching tasks
         """
-        try:
-            query = self.client.table("tasks").select("id", count="exact")
-            
-            if user_id:
-                query = query.eq("user_id", user_id)
-            if status:
-                query = query.eq("status", status)
-            
-            response = query.execute()
-            return response.count if hasattr(response, 'count') else len(response.data)
-        except Exception as e:
-            logger.error(f"Error counting tasks: {str(e)}")
-            raise
-
+        async def fetch():
+            try:
+                client = await self.init()
+                if self._pool is not None:
+                    return await self._fast_task_count(user_id, status)
+                
+                # HEAD request: PostgREST returns only the count header, no rows
+                query = client.table("tasks").select("id", count="exact", head=True)
+                
+                if user_id:
+                    query = query.eq("user_id", user_id)
+                if status:
+                    query = query.eq("status", status)
+                
+                response = await query.execute()
+                return response.count
+            except Exception as e:
+                logger.error("Error counting tasks: %s", e)
+                raise
+        
+        return await self._read(("get_task_count", user_id, status), nocache, fetch)
+    
 
 # Global instance
 _db_client: Optional[SupabaseClient] = None
@@ -2,22 +2,66 @@
 FastAPI Backend for MCP Todo.
 Exposes MCP tools as REST endpoints for the React frontend.
 """
-from fastapi import FastAPI, HTTPException, status
+import re
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 
-from src.mcp_server.tools import (
-    handle_add_task,
-    handle_list_tasks,
-    handle_update_task,
-    handle_delete_task,
-    handle_smart_add,
-    handle_search_tasks,
-    handle_smart_update
-)
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+from ai import TaskAgent, BatchingTaskParser, get_task_agent, get_batching_parser, aclose_http_clients
+from database import SupabaseClient, get_db_client
+
+# Shared singletons, resolved once at import rather than per request
+db = get_db_client()
+agent = get_task_agent()
+batching_parser = get_batching_parser()
+
+
+def db_dep() -> SupabaseClient:
+    """FastAPI dependency returning the shared database client."""
+    return db
+
+
+def agent_dep() -> TaskAgent:
+    """FastAPI dependency returning the shared task agent."""
+    return agent
+
+
+def batching_parser_dep() -> BatchingTaskParser:
+    """FastAPI dependency returning the shared batching parser."""
+    return batching_parser
+
 
-app = FastAPI(title="MCP Todo API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database connection pool at startup; close it and the Groq HTTP pool on shutdown."""
+    await db.init()
+    yield
+    await db.aclose()
+    await aclose_http_clients()
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response encoded with orjson (handles UUID and datetime natively)."""
+    
+    def render(self, content: Any) -> bytes:
+        """Serialize the response body to JSON bytes."""
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+app = FastAPI(
+    title="MCP Todo API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+)
 
 # Configure CORS
 app.add_middleware(
@@ -49,17 +93,46 @@ class UpdateTaskRequest(BaseModel):
 class NaturalLanguageRequest(BaseModel):
     text: str
     current_time: Optional[str] = None
+    no_cache: bool = False  # Always ask the LLM, bypassing cached parses
+
+
+# Seconds (and fractions) in "3:04:05 PM" or "15:04:05.123+02:00"
+_SECONDS_RE = re.compile(r'(\d{1,2}:\d{2}):\d{2}(?:\.\d+)?')
+
+
+def _minute_bucket(current_time: Optional[str]) -> Optional[str]:
+    """Drop the seconds from the client's clock so repeat requests share cache entries."""
+    if not current_time:
+        return current_time
+    return _SECONDS_RE.sub(r'\1', current_time, count=1)
 
 
 # --- Routes ---
 
 @app.get("/health")
 async def health_check():
+    """Liveness probe; constant-time and never touches the database."""
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check(db: SupabaseClient = Depends(db_dep)):
+    """Readiness probe; answers 503 unless the database responds within a second."""
+    try:
+        await asyncio.wait_for(db.get_task_count(nocache=True), timeout=1.0)
+    except Exception as e:
+        detail = "Database timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail)
+    return {"status": "ready"}
+
 @app.get("/tasks")
-async def list_tasks(status: Optional[str] = None, priority: Optional[str] = None, limit: int = 100):
-    """List tasks with optional filters."""
+async def list_tasks(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: int = 100,
+    nocache: bool = False,
+    db: SupabaseClient = Depends(db_dep)
+):
+    """List tasks with optional filters; pass nocache=true to skip the query cache."""
     args = {"limit": limit}
     if status and status != "All":
         args["status"] = status.lower() # DB expects lowercase
@@ -67,52 +140,51 @@ async def list_tasks(status: Optional[str] = None, priority: Optional[str] = Non
         args["priority"] = priority.lower()
         
     try:
-        from database import get_db_client
-        db = get_db_client()
-        tasks = db.list_tasks(status=args.get("status"), priority=args.get("priority"), limit=limit)
+        tasks = await db.list_tasks(
+            status=args.get("status"),
+            priority=args.get("priority"),
+            limit=limit,
+            nocache=nocache
+        )
         return tasks
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/tasks")
-async def create_task(task: CreateTaskRequest):
+async def create_task(task: CreateTaskRequest, db: SupabaseClient = Depends(db_dep)):
     """Create a structured task."""
     try:
-        from database import get_db_client
-        db = get_db_client()
-        
         task_data = task.model_dump(exclude_none=True)
         # Set default status
         task_data["status"] = "pending"
         
-        created_task = db.create_task(task_data)
+        created_task = await db.create_task(task_data)
         return created_task
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.patch("/tasks/{task_id}")
-async def update_task(task_id: str, updates: UpdateTaskRequest):
+async def update_task(
+    task_id: str,
+    updates: UpdateTaskRequest,
+    db: SupabaseClient = Depends(db_dep)
+):
     """Update a task."""
     try:
-        from database import get_db_client
-        db = get_db_client()
-        
         update_data = updates.model_dump(exclude_none=True)
         if not update_data:
             return {"message": "No updates provided"}
             
-        updated_task = db.update_task(task_id, update_data)
+        updated_task = await db.update_task(task_id, update_data)
         return updated_task
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.delete("/tasks/{task_id}")
-async def delete_task(task_id: str):
+async def delete_task(task_id: str, db: SupabaseClient = Depends(db_dep)):
     """Delete a task."""
     try:
-        from database import get_db_client
-        db = get_db_client()
-        db.delete_task(task_id)
+        await db.delete_task(task_id)
         return {"success": True, "id": task_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -121,40 +193,35 @@ async def delete_task(task_id: str):
 # --- AI Endpoints ---
 
 @app.post("/ai/smart-add")
-async def smart_add(request: NaturalLanguageRequest):
+async def smart_add(
+    request: NaturalLanguageRequest,
+    db: SupabaseClient = Depends(db_dep),
+    agent: TaskAgent = Depends(agent_dep),
+    batching_parser: BatchingTaskParser = Depends(batching_parser_dep)
+):
     """Create a task from natural language."""
     try:
         # Here we CAN reuse the Smart Tool logic but we want JSON back.
         # The tool returns TextContent.
         # Better to reuse the Agent logic directly.
-        from ai import get_task_agent
-        from database import get_db_client
         
-        agent = get_task_agent()
-        db = get_db_client()
-        
-        # Returns a LIST of tasks now
-        task_data_list = agent.parse_task_nl(request.text, current_time=request.current_time)
+        current_time = _minute_bucket(request.current_time)
+        if request.no_cache:
+            task_data_list = await agent.parse_task_nl_async(
+                request.text, current_time=current_time, use_cache=False
+            )
+        else:
+            # Returns a LIST of tasks now; concurrent requests share one LLM call
+            task_data_list = await batching_parser.parse(request.text, current_time=current_time)
         
-        created_tasks = []
         for task_data in task_data_list:
             if 'status' not in task_data:
                 task_data['status'] = 'pending'
-            
-            created = db.create_task(task_data)
-            created_tasks.append(created)
-            
-        # If single task, return object (backward compatibility/simplicity for frontend if it expects obj)
-        # But frontend logic might need update if it expects array? 
-        # Actually frontend `smartAdd` in utils.js just returns response.json().
-        # If we return an array, frontend needs to handle it. 
-        # Let's check frontend. Use `StickyBoard`? No `TasksContext`?
         
-        # Let's return the list if > 1, else single object? 
-        # Or better -> Always return list? 
-        # Existing frontend usually expects single object if it pushes to state?
-        # Let's look at frontend TasksContext.
+        # One multi-row insert instead of a round-trip per task
+        created_tasks = await db.create_tasks(task_data_list)
         
+        # A single task is returned as an object for existing frontend callers
         if len(created_tasks) == 1:
             return created_tasks[0]
         return created_tasks
@@ -163,21 +230,24 @@ async def smart_add(request: NaturalLanguageRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/ai/search")
-async def smart_search(request: NaturalLanguageRequest):
+async def smart_search(
+    request: NaturalLanguageRequest,
+    db: SupabaseClient = Depends(db_dep),
+    agent: TaskAgent = Depends(agent_dep)
+):
     """Search using natural language."""
     try:
-        from ai import get_task_agent
-        from database import get_db_client
-        
-        agent = get_task_agent()
-        db = get_db_client()
-        
-        filters = agent.search_tasks_nl(request.text)
+        filters = await agent.search_tasks_nl_async(request.text, use_cache=not request.no_cache)
         
         if 'search_text' in filters:
-            tasks = db.search_tasks(filters['search_text'])
+            # Text search AND-ed with any structured filters, in one query
+            tasks = await db.search_tasks(
+                filters['search_text'],
+                status=filters.get('status'),
+                priority=filters.get('priority')
+            )
         else:
-            tasks = db.list_tasks(
+            tasks = await db.list_tasks(
                 status=filters.get('status'),
                 priority=filters.get('priority'),
                 limit=100
@@ -187,29 +257,35 @@ async def smart_search(request: NaturalLanguageRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/ai/update")
-async def smart_update_endpoint(request: NaturalLanguageRequest):
+async def smart_update_endpoint(
+    request: NaturalLanguageRequest,
+    db: SupabaseClient = Depends(db_dep),
+    agent: TaskAgent = Depends(agent_dep)
+):
     """Update using natural language with fuzzy matching."""
     try:
-        from ai import get_task_agent
-        from database import get_db_client
-        
-        agent = get_task_agent()
-        db = get_db_client()
-        
-        all_tasks = db.list_tasks(limit=1000)
-        update_info = agent.extract_task_update(request.text, all_tasks)
+        # The prompt only shows the 10 most recent tasks
+        recent_tasks = await db.list_tasks(limit=10)
+        update_info = await agent.extract_task_update_async(
+            request.text, recent_tasks, use_cache=not request.no_cache
+        )
         
         task_match = update_info.get('task_match', '')
         updates = update_info.get('updates', {})
         
         if not task_match or not updates:
             raise HTTPException(status_code=400, detail="Could not understand update command")
-            
-        matching_task_id = agent.find_matching_task(task_match, all_tasks)
+        
+        # Let full-text search narrow the candidates; scan everything when its
+        # hits hold neither a match nor an ambiguity (e.g. description-only
+        # hits, or a typo for the fuzzy matcher)
+        candidates = await db.search_tasks(task_match)
+        matching_task_id, matches = agent.find_matching_task(task_match, candidates)
+        if not matching_task_id and len(matches) <= 1:
+            candidates = await db.list_tasks(limit=1000)
+            matching_task_id, matches = agent.find_matching_task(task_match, candidates)
         
         if not matching_task_id:
-            # Check for multiple matches logic
-            matches = [t for t in all_tasks if task_match.lower() in t.get('title', '').lower()]
             if len(matches) > 1:
                 return {
                     "status": "ambiguous",
@@ -219,7 +295,7 @@ async def smart_update_endpoint(request: NaturalLanguageRequest):
             else:
                 raise HTTPException(status_code=404, detail=f"No task found matching '{task_match}'")
                 
-        updated_task = db.update_task(matching_task_id, updates)
+        updated_task = await db.update_task(matching_task_id, updates)
         return {"status": "success", "task": updated_task}
         
     except HTTPException:
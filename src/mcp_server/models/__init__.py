@@ -1,6 +1,22 @@
 """
 Models package for MCP Todo Server.
 """
-from .task import Task, TaskCreate, TaskUpdate, TaskList, TaskResponse
+from .task import (
+    Task,
+    TaskCreate,
+    TaskUpdate,
+    TaskList,
+    TaskResponse,
+    TaskStatus,
+    TaskPriority
+)
 
-__all__ = ["Task", "TaskCreate", "TaskUpdate", "TaskList", "TaskResponse"]
+__all__ = [
+    "Task",
+    "TaskCreate",
+    "TaskUpdate",
+    "TaskList",
+    "TaskResponse",
+    "TaskStatus",
+    "TaskPriority"
+]
@@ -2,17 +2,24 @@
 Pydantic models for task management.
 """
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Literal, Optional, List
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import UUID
 
 
+# Literal enums validate with a set lookup instead of a regex match
+TaskStatus = Literal["pending", "in_progress", "completed"]
+TaskPriority = Literal["low", "medium", "high"]
+
+
 class TaskBase(BaseModel):
     """Base task model with common fields."""
+    model_config = ConfigDict(str_max_length=2000)
+    
     title: str = Field(..., min_length=1, max_length=500, description="Task title")
     description: Optional[str] = Field(None, max_length=2000, description="Detailed task description")
-    status: str = Field(default="pending", pattern="^(pending|in_progress|completed)$")
-    priority: str = Field(default="medium", pattern="^(low|medium|high)$")
+    status: TaskStatus = "pending"
+    priority: TaskPriority = "medium"
     category: Optional[str] = Field(None, max_length=100)
     due_date: Optional[datetime] = None
     tags: Optional[List[str]] = Field(default_factory=list)
@@ -28,8 +35,8 @@ class TaskUpdate(BaseModel):
     """Model for updating an existing task. All fields are optional."""
     title: Optional[str] = Field(None, min_length=1, max_length=500)
     description: Optional[str] = Field(None, max_length=2000)
-    status: Optional[str] = Field(None, pattern="^(pending|in_progress|completed)$")
-    priority: Optional[str] = Field(None, pattern="^(low|medium|high)$")
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
     category: Optional[str] = Field(None, max_length=100)
     due_date: Optional[datetime] = None
     tags: Optional[List[str]] = None
@@ -38,14 +45,13 @@ class TaskUpdate(BaseModel):
 
 class Task(TaskBase):
     """Complete task model with all fields including DB-generated ones."""
+    model_config = ConfigDict(from_attributes=True)  # Allows creation from ORM objects
+    
     id: UUID
     user_id: Optional[UUID] = None
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True  # Allows creation from ORM objects
-
 
 class TaskList(BaseModel):
     """Model for returning a list of tasks."""
@@ -1,5 +1,9 @@
 """
 Tools package for MCP Todo Server.
+
+The AI-powered handlers are loaded on first access so that importing the
+package (or running only CRUD tools) does not build the Groq client and
+task agent.
 """
 from .crud import (
     handle_add_task,
@@ -7,11 +11,9 @@ from .crud import (
     handle_update_task,
     handle_delete_task
 )
-from .smart import (
-    handle_smart_add,
-    handle_search_tasks,
-    handle_smart_update
-)
+
+# Handlers provided by .smart, imported lazily through __getattr__
+_SMART_HANDLERS = ("handle_smart_add", "handle_search_tasks", "handle_smart_update")
 
 __all__ = [
     "handle_add_task",
@@ -22,3 +24,22 @@ __all__ = [
     "handle_search_tasks",
     "handle_smart_update"
 ]
+
+
+def __getattr__(name: str):
+    """
+    Import the AI handlers on first use (PEP 562).
+    
+    Args:
+        name: Attribute being looked up on the package
+        
+    Returns:
+        The requested handler
+    """
+    if name in _SMART_HANDLERS:
+        from . import smart
+        
+        value = getattr(smart, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,18 +3,155 @@ CRUD tools for MCP Todo Server.
 
 These are deterministic tools that don't use AI.
 """
+import asyncio
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from mcp.types import TextContent
+from supabase import PostgrestAPIError
 
 from database import get_db_client
 
 logger = logging.getLogger(__name__)
 
+_STATUS_EMOJI = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
+_PRIORITY_EMOJI = {"low": "🔵", "medium": "🟡", "high": "🔴"}
+
+# Fields update_task may change; anything else in the arguments is ignored
+_UPDATABLE_FIELDS = ("title", "description", "status", "priority", "category", "due_date")
+
+# Postgres error classes PostgREST answers with a 4xx: data exceptions,
+# constraint violations, and syntax/access errors
+_REJECTED_SQLSTATE_CLASSES = ("22", "23", "42")
+
 # Get database client
 db = get_db_client()
 
 
+def _is_rejected_write(error: BaseException) -> bool:
+    """
+    Tell whether PostgREST definitively refused a write.
+    
+    A 4xx rejection rolls the whole request back, so its rows can safely be
+    sent again. Timeouts, dropped connections and 5xx errors may arrive after
+    the insert committed, so those are never treated as rejections.
+    
+    Args:
+        error: Exception raised by the database client
+        
+    Returns:
+        True if nothing from the request was written
+    """
+    if not isinstance(error, PostgrestAPIError):
+        return False
+    
+    code = str(error.code or "")
+    if code.isdigit() and len(code) == 3:
+        # Non-JSON error bodies carry the HTTP status as the code
+        return code.startswith("4")
+    if code.startswith("PGRST"):
+        # PGRST1xx/2xx are request and schema errors, raised before any SQL runs
+        return code[5:6] in ("1", "2")
+    return code[:2] in _REJECTED_SQLSTATE_CLASSES
+
+
+class WriteBatcher:
+    """Coalesces task inserts arriving within a few milliseconds into one multi-row insert."""
+    
+    def __init__(self, max_batch: int = 50, max_wait_ms: float = 5):
+        """
+        Initialize the write batcher.
+        
+        Args:
+            max_batch: Maximum number of rows per insert
+            max_wait_ms: How long the first insert in a batch waits for company
+        """
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: set = set()
+    
+    async def create(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insert a task, batched with concurrent callers.
+        
+        Args:
+            task_data: Dictionary containing task fields
+            
+        Returns:
+            Created task data
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((task_data, future))
+        
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        """Start writing every pending row."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._write(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        """Insert one batch and resolve its futures."""
+        if len(batch) > 1:
+            try:
+                created = await db.create_tasks([task_data for task_data, _ in batch])
+            except Exception as e:
+                if not _is_rejected_write(e):
+                    # The insert may have committed before the error reached
+                    # us; retrying could write every row twice
+                    logger.error("Batched insert of %s tasks failed: %s", len(batch), e)
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    return
+                # One bad row must not fail its neighbours; retry them one by one
+                logger.warning("Batched insert of %s tasks rejected, inserting individually: %s", len(batch), e)
+            else:
+                # The rows are committed by now, so a short reply must never be
+                # retried (that would insert them twice); fail the callers instead
+                error = None
+                if len(created) != len(batch):
+                    error = RuntimeError(f"Expected {len(batch)} created rows, got {len(created)}")
+                    logger.error("Batched insert returned the wrong number of rows: %s", error)
+                for index, (_, future) in enumerate(batch):
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(created[index])
+                return
+        
+        results = await asyncio.gather(
+            *(db.create_task(task_data) for task_data, _ in batch), return_exceptions=True
+        )
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+# Shared by every add_task call in this process
+_write_batcher = WriteBatcher()
+
+
 async def handle_add_task(arguments: dict) -> list[TextContent]:
     """
     Handle add_task tool call.
@@ -40,8 +177,8 @@ async def handle_add_task(arguments: dict) -> list[TextContent]:
         if "due_date" in arguments and arguments["due_date"]:
             task_data["due_date"] = arguments["due_date"]
         
-        # Create task in database
-        created_task = db.create_task(task_data)
+        # Create task in database, sharing one insert with concurrent calls
+        created_task = await _write_batcher.create(task_data)
         
         return [
             TextContent(
@@ -54,7 +191,7 @@ async def handle_add_task(arguments: dict) -> list[TextContent]:
             )
         ]
     except Exception as e:
-        logger.error(f"Error in handle_add_task: {str(e)}")
+        logger.error("Error in handle_add_task: %s", e)
         raise
 
 
@@ -74,31 +211,28 @@ async def handle_list_tasks(arguments: dict) -> list[TextContent]:
         limit = arguments.get("limit", 100)
         
         # Get tasks from database
-        tasks = db.list_tasks(status=status, priority=priority, limit=limit)
+        tasks = await db.list_tasks(status=status, priority=priority, limit=limit)
         
         if not tasks:
             return [TextContent(type="text", text="No tasks found.")]
         
-        # Format task list
-        task_list = f"📋 Found {len(tasks)} task(s):\n\n"
+        # Format task list (collect parts and join once; += is quadratic)
+        parts: list[str] = [f"📋 Found {len(tasks)} task(s):\n\n"]
         for task in tasks:
-            status_emoji = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
-            priority_emoji = {"low": "🔵", "medium": "🟡", "high": "🔴"}
-            
-            task_list += (
-                f"{status_emoji.get(task['status'], '•')} "
-                f"{priority_emoji.get(task['priority'], '•')} "
+            parts.append(
+                f"{_STATUS_EMOJI.get(task['status'], '•')} "
+                f"{_PRIORITY_EMOJI.get(task['priority'], '•')} "
                 f"{task['title']}\n"
                 f"   ID: {task['id']}\n"
                 f"   Status: {task['status']} | Priority: {task['priority']}\n"
             )
             if task.get('due_date'):
-                task_list += f"   Due: {task['due_date']}\n"
-            task_list += "\n"
+                parts.append(f"   Due: {task['due_date']}\n")
+            parts.append("\n")
         
-        return [TextContent(type="text", text=task_list)]
+        return [TextContent(type="text", text="".join(parts))]
     except Exception as e:
-        logger.error(f"Error in handle_list_tasks: {str(e)}")
+        logger.error("Error in handle_list_tasks: %s", e)
         raise
 
 
@@ -116,16 +250,17 @@ async def handle_update_task(arguments: dict) -> list[TextContent]:
         task_id = arguments["task_id"]
         
         # Build updates dictionary (only include provided fields)
-        updates = {}
-        for field in ["title", "description", "status", "priority", "category", "due_date"]:
-            if field in arguments and arguments[field] is not None:
-                updates[field] = arguments[field]
+        updates = {
+            field: arguments[field]
+            for field in _UPDATABLE_FIELDS
+            if arguments.get(field) is not None
+        }
         
         if not updates:
             return [TextContent(type="text", text="No updates provided.")]
         
         # Update task in database
-        updated_task = db.update_task(task_id, updates)
+        updated_task = await db.update_task(task_id, updates)
         
         return [
             TextContent(
@@ -138,7 +273,7 @@ async def handle_update_task(arguments: dict) -> list[TextContent]:
             )
         ]
     except Exception as e:
-        logger.error(f"Error in handle_update_task: {str(e)}")
+        logger.error("Error in handle_update_task: %s", e)
         raise
 
 
@@ -156,7 +291,7 @@ async def handle_delete_task(arguments: dict) -> list[TextContent]:
         task_id = arguments["task_id"]
         
         # Delete task from database
-        db.delete_task(task_id)
+        await db.delete_task(task_id)
         
         return [
             TextContent(
@@ -165,5 +300,5 @@ async def handle_delete_task(arguments: dict) -> list[TextContent]:
             )
         ]
     except Exception as e:
-        logger.error(f"Error in handle_delete_task: {str(e)}")
+        logger.error("Error in handle_delete_task: %s", e)
         raise
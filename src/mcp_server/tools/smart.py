@@ -3,6 +3,7 @@ AI-powered smart tools for MCP Todo Server.
 
 These tools use natural language understanding via Groq API.
 """
+import asyncio
 import logging
 from typing import Any, Dict, List
 from mcp.types import TextContent
@@ -12,6 +13,12 @@ from ai import get_task_agent
 
 logger = logging.getLogger(__name__)
 
+_STATUS_EMOJI = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
+_PRIORITY_EMOJI = {"low": "🔵", "medium": "🟡", "high": "🔴"}
+
+# Maximum number of tasks returned by a filter-only search
+_SEARCH_LIMIT = 100
+
 # Get database and AI clients
 db = get_db_client()
 agent = get_task_agent()
@@ -32,39 +39,67 @@ async def handle_smart_add(arguments: dict) -> list[TextContent]:
         if not natural_language:
             return [TextContent(type="text", text="❌ Error: natural_language parameter is required")]
         
-        logger.info(f"Processing smart_add: {natural_language}")
-        
-        # Parse task using AI agent
-        task_data = agent.parse_task_nl(natural_language)
-        
-        # Ensure status is set
-        if 'status' not in task_data:
-            task_data['status'] = 'pending'
-        
-        # Create task in database
-        created_task = db.create_task(task_data)
-        
-        # Format response
-        response_text = f"✅ Task created successfully!\n\n"
-        response_text += f"📝 Title: {created_task['title']}\n"
-        response_text += f"🎯 Priority: {created_task['priority']}\n"
-        response_text += f"📊 Status: {created_task['status']}\n"
+        logger.info("Processing smart_add: %s", natural_language)
+        
+        # Insert each task as soon as its JSON object has streamed in, while
+        # the LLM is still generating the rest of the response
+        inserts = []
+        failures: list[str] = []
+        try:
+            async for task_data in agent.iter_task_nl_async(natural_language):
+                # Ensure status is set
+                task_data.setdefault('status', 'pending')
+                inserts.append(asyncio.ensure_future(db.create_task(task_data)))
+        except Exception as e:
+            logger.error("Task parsing failed after %s task(s): %s", len(inserts), e)
+            failures.append(f"Parsing stopped early: {e}")
+        finally:
+            # Inserts already started may have committed; always collect them
+            results = await asyncio.gather(*inserts, return_exceptions=True)
+        
+        created_tasks = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("Error creating task in smart_add: %s", result)
+                failures.append(f"Could not create a task: {result}")
+            else:
+                created_tasks.append(result)
         
-        if created_task.get('category'):
-            response_text += f"🏷️ Category: {created_task['category']}\n"
+        if failures and not created_tasks:
+            return [TextContent(type="text", text=f"❌ Error creating task: {'; '.join(failures)}")]
         
-        if created_task.get('due_date'):
-            response_text += f"📅 Due: {created_task['due_date']}\n"
+        # Format response (partial failures list the tasks that did get created,
+        # so a retry does not duplicate them)
+        if failures:
+            parts: list[str] = [f"⚠️ Created {len(created_tasks)} task(s); {len(failures)} failed\n\n"]
+        elif len(created_tasks) == 1:
+            parts = ["✅ Task created successfully!\n\n"]
+        else:
+            parts = [f"✅ Created {len(created_tasks)} tasks!\n\n"]
         
-        if created_task.get('tags'):
-            response_text += f"🏷️ Tags: {', '.join(created_task['tags'])}\n"
+        for created_task in created_tasks:
+            parts.append(f"📝 Title: {created_task['title']}\n")
+            parts.append(f"🎯 Priority: {created_task['priority']}\n")
+            parts.append(f"📊 Status: {created_task['status']}\n")
+            
+            if created_task.get('category'):
+                parts.append(f"🏷️ Category: {created_task['category']}\n")
+            
+            if created_task.get('due_date'):
+                parts.append(f"📅 Due: {created_task['due_date']}\n")
+            
+            if created_task.get('tags'):
+                parts.append(f"🏷️ Tags: {', '.join(created_task['tags'])}\n")
+            
+            parts.append(f"\n🆔 ID: {created_task['id']}\n\n")
         
-        response_text += f"\n🆔 ID: {created_task['id']}"
+        for failure in failures:
+            parts.append(f"❌ {failure}\n")
         
-        return [TextContent(type="text", text=response_text)]
+        return [TextContent(type="text", text="".join(parts).rstrip())]
         
     except Exception as e:
-        logger.error(f"Error in handle_smart_add: {str(e)}")
+        logger.error("Error in handle_smart_add: %s", e)
         return [TextContent(type="text", text=f"❌ Error creating task: {str(e)}")]
 
 
@@ -83,53 +118,70 @@ async def handle_search_tasks(arguments: dict) -> list[TextContent]:
         if not query:
             return [TextContent(type="text", text="❌ Error: query parameter is required")]
         
-        logger.info(f"Processing search: {query}")
+        logger.info("Processing search: %s", query)
+        
+        # Fetch the most recent tasks while the LLM works out the filters, so
+        # filter-only searches don't wait for a second round trip
+        recent = asyncio.ensure_future(db.list_tasks(limit=_SEARCH_LIMIT))
+        recent.add_done_callback(lambda f: f.cancelled() or f.exception())
         
-        # Convert natural language to filters using AI
-        filters = agent.search_tasks_nl(query)
+        try:
+            # Convert natural language to filters using AI
+            filters = await agent.search_tasks_nl_async(query)
+        except BaseException:
+            recent.cancel()
+            raise
+        
+        status = filters.get('status')
+        priority = filters.get('priority')
         
         # Query database with filters
         if 'search_text' in filters:
-            # Use text search
-            tasks = db.search_tasks(filters['search_text'])
+            # The client cancels a shared read once its last caller leaves,
+            # so this stops the speculative query rather than just ignoring it
+            recent.cancel()
+            # Text search AND-ed with any structured filters, in one query
+            tasks = await db.search_tasks(filters['search_text'], status=status, priority=priority)
         else:
-            # Use structured filters
-            tasks = db.list_tasks(
-                status=filters.get('status'),
-                priority=filters.get('priority'),
-                limit=100
-            )
+            tasks = await recent
+            if len(tasks) < _SEARCH_LIMIT:
+                # A partial page holds every task, so filtering it is exact
+                tasks = [
+                    task for task in tasks
+                    if (status is None or task['status'] == status)
+                    and (priority is None or task['priority'] == priority)
+                ]
+            elif status or priority:
+                # Matches may lie beyond the first page; use structured filters
+                tasks = await db.list_tasks(status=status, priority=priority, limit=_SEARCH_LIMIT)
         
         if not tasks:
             return [TextContent(type="text", text=f"🔍 No tasks found matching: '{query}'")]
         
         # Format results
-        response_text = f"🔍 Found {len(tasks)} task(s) matching '{query}':\n\n"
-        
-        status_emoji = {"pending": "⏳", "in_progress": "🔄", "completed": "✅"}
-        priority_emoji = {"low": "🔵", "medium": "🟡", "high": "🔴"}
+        parts: list[str] = [f"🔍 Found {len(tasks)} task(s) matching '{query}':\n\n"]
         
         for task in tasks:
-            response_text += (
-                f"{status_emoji.get(task['status'], '•')} "
-                f"{priority_emoji.get(task['priority'], '•')} "
+            parts.append(
+                f"{_STATUS_EMOJI.get(task['status'], '•')} "
+                f"{_PRIORITY_EMOJI.get(task['priority'], '•')} "
                 f"{task['title']}\n"
                 f"   ID: {task['id']}\n"
                 f"   Status: {task['status']} | Priority: {task['priority']}\n"
             )
             
             if task.get('category'):
-                response_text += f"   Category: {task['category']}\n"
+                parts.append(f"   Category: {task['category']}\n")
             
             if task.get('due_date'):
-                response_text += f"   Due: {task['due_date']}\n"
+                parts.append(f"   Due: {task['due_date']}\n")
             
-            response_text += "\n"
+            parts.append("\n")
         
-        return [TextContent(type="text", text=response_text)]
+        return [TextContent(type="text", text="".join(parts))]
         
     except Exception as e:
-        logger.error(f"Error in handle_search_tasks: {str(e)}")
+        logger.error("Error in handle_search_tasks: %s", e)
         return [TextContent(type="text", text=f"❌ Error searching tasks: {str(e)}")]
 
 
@@ -148,16 +200,16 @@ async def handle_smart_update(arguments: dict) -> list[TextContent]:
         if not natural_language:
             return [TextContent(type="text", text="❌ Error: natural_language parameter is required")]
         
-        logger.info(f"Processing smart_update: {natural_language}")
+        logger.info("Processing smart_update: %s", natural_language)
         
-        # Get all tasks for fuzzy matching
-        all_tasks = db.list_tasks(limit=1000)
+        # The prompt only shows the 10 most recent tasks
+        recent_tasks = await db.list_tasks(limit=10)
         
-        if not all_tasks:
+        if not recent_tasks:
             return [TextContent(type="text", text="❌ No tasks found in the database")]
         
         # Extract update information using AI
-        update_info = agent.extract_task_update(natural_language, all_tasks)
+        update_info = await agent.extract_task_update_async(natural_language, recent_tasks)
         
         # Find matching task
         task_match = update_info.get('task_match', '')
@@ -170,22 +222,25 @@ async def handle_smart_update(arguments: dict) -> list[TextContent]:
                      f"Please be more specific about which task to update and what to change."
             )]
         
-        # Find task by fuzzy matching
-        matching_task_id = agent.find_matching_task(task_match, all_tasks)
+        # Let the database narrow the candidates; scan everything when its
+        # hits hold neither a match nor an ambiguity (e.g. description-only
+        # hits, or a typo for the fuzzy matcher)
+        candidates = await db.search_tasks(task_match)
+        matching_task_id, matches = agent.find_matching_task(task_match, candidates)
+        if not matching_task_id and len(matches) <= 1:
+            candidates = await db.list_tasks(limit=1000)
+            matching_task_id, matches = agent.find_matching_task(task_match, candidates)
         
         if not matching_task_id:
-            # Check if multiple matches
-            matches = [t for t in all_tasks if task_match.lower() in t.get('title', '').lower()]
-            
             if len(matches) > 1:
                 # Multiple matches - ask for clarification
-                response_text = f"🤔 Found {len(matches)} tasks matching '{task_match}':\n\n"
+                parts: list[str] = [f"🤔 Found {len(matches)} tasks matching '{task_match}':\n\n"]
                 for i, task in enumerate(matches[:5], 1):  # Show max 5
-                    response_text += f"{i}. {task['title']} (ID: {task['id']})\n"
-                    response_text += f"   Status: {task['status']} | Priority: {task['priority']}\n\n"
+                    parts.append(f"{i}. {task['title']} (ID: {task['id']})\n")
+                    parts.append(f"   Status: {task['status']} | Priority: {task['priority']}\n\n")
                 
-                response_text += "\nPlease use the update_task tool with the specific task ID."
-                return [TextContent(type="text", text=response_text)]
+                parts.append("\nPlease use the update_task tool with the specific task ID.")
+                return [TextContent(type="text", text="".join(parts))]
             else:
                 return [TextContent(
                     type="text",
@@ -193,24 +248,24 @@ async def handle_smart_update(arguments: dict) -> list[TextContent]:
                 )]
         
         # Update the task
-        updated_task = db.update_task(matching_task_id, updates)
+        updated_task = await db.update_task(matching_task_id, updates)
         
         # Format response
-        response_text = f"✅ Task updated successfully!\n\n"
-        response_text += f"📝 Title: {updated_task['title']}\n"
-        response_text += f"📊 Status: {updated_task['status']}\n"
-        response_text += f"🎯 Priority: {updated_task['priority']}\n"
+        parts = [f"✅ Task updated successfully!\n\n"]
+        parts.append(f"📝 Title: {updated_task['title']}\n")
+        parts.append(f"📊 Status: {updated_task['status']}\n")
+        parts.append(f"🎯 Priority: {updated_task['priority']}\n")
         
         if updated_task.get('category'):
-            response_text += f"🏷️ Category: {updated_task['category']}\n"
+            parts.append(f"🏷️ Category: {updated_task['category']}\n")
         
         if updated_task.get('due_date'):
-            response_text += f"📅 Due: {updated_task['due_date']}\n"
+            parts.append(f"📅 Due: {updated_task['due_date']}\n")
         
-        response_text += f"\n🆔 ID: {updated_task['id']}"
+        parts.append(f"\n🆔 ID: {updated_task['id']}")
         
-        return [TextContent(type="text", text=response_text)]
+        return [TextContent(type="text", text="".join(parts))]
         
     except Exception as e:
-        logger.error(f"Error in handle_smart_update: {str(e)}")
+        logger.error("Error in handle_smart_update: %s", e)
         return [TextContent(type="text", text=f"❌ Error updating task: {str(e)}")]
@@ -7,6 +7,8 @@ import asyncio
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -56,6 +58,8 @@ def test_parsers():
         print(f"   '{text}' → {category}")
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(60)
 def test_groq_client():
     """Test Groq API client."""
     print("\n" + "=" * 60)
@@ -105,6 +109,8 @@ def test_groq_client():
         print("   Make sure GROQ_API_KEY is set in your .env file")
 
 
+@pytest.mark.slow
+@pytest.mark.timeout(60)
 def test_task_agent():
     """Test LangChain task agent."""
     print("\n" + "=" * 60)
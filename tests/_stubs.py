@@ -0,0 +1,64 @@
+"""
+Lightweight test doubles for the tool tests.
+
+StubDB stands in for SupabaseClient where a test only needs canned return
+values and a record of the calls made; it skips the per-attribute
+bookkeeping that unittest.mock does.
+"""
+import inspect
+from typing import Any, Dict, List, Tuple
+
+
+class StubDB:
+    """Async stand-in for SupabaseClient that records calls and returns preset values."""
+    
+    def __init__(self):
+        """Initialize with no preset results (every method returns None)."""
+        # Method name -> value to return, an exception instance to raise, or a
+        # (sync or async) function called with the method's arguments
+        self.returns: Dict[str, Any] = {}
+        self.calls: List[Tuple[str, tuple, dict]] = []
+    
+    def called(self, name: str) -> List[Tuple[tuple, dict]]:
+        """Return the (args, kwargs) of every call made to one method."""
+        return [(args, kwargs) for method, args, kwargs in self.calls if method == name]
+    
+    async def _call(self, name: str, *args, **kwargs) -> Any:
+        """Record a call and return (or raise) the preset result for it."""
+        self.calls.append((name, args, kwargs))
+        result = self.returns.get(name)
+        if callable(result):
+            result = result(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    
+    async def create_task(self, task_data):
+        """Stand-in for SupabaseClient.create_task."""
+        return await self._call("create_task", task_data)
+    
+    async def create_tasks(self, tasks):
+        """Stand-in for SupabaseClient.create_tasks."""
+        return await self._call("create_tasks", tasks)
+    
+    async def get_task(self, task_id, **kwargs):
+        """Stand-in for SupabaseClient.get_task."""
+        return await self._call("get_task", task_id, **kwargs)
+    
+    async def list_tasks(self, **kwargs):
+        """Stand-in for SupabaseClient.list_tasks."""
+        return await self._call("list_tasks", **kwargs)
+    
+    async def update_task(self, task_id, updates):
+        """Stand-in for SupabaseClient.update_task."""
+        return await self._call("update_task", task_id, updates)
+    
+    async def delete_task(self, task_id):
+        """Stand-in for SupabaseClient.delete_task."""
+        return await self._call("delete_task", task_id)
+    
+    async def search_tasks(self, query, **kwargs):
+        """Stand-in for SupabaseClient.search_tasks."""
+        return await self._call("search_tasks", query, **kwargs)
@@ -0,0 +1,47 @@
+"""
+Shared fixtures for the test suite.
+"""
+import pytest
+from unittest.mock import Mock
+
+from ai.agent import TaskAgent
+from tests._stubs import StubDB
+
+
+@pytest.fixture(scope="session")
+def crud_mod():
+    """The CRUD tools module, imported once per test session."""
+    from src.mcp_server.tools import crud
+    return crud
+
+
+@pytest.fixture(scope="session")
+def smart_mod():
+    """The smart tools module, imported once per test session."""
+    from src.mcp_server.tools import smart
+    return smart
+
+
+@pytest.fixture
+def stub_crud_db(monkeypatch, crud_mod):
+    """Replace the CRUD tools' database client with a fresh StubDB."""
+    stub = StubDB()
+    monkeypatch.setattr(crud_mod, "db", stub)
+    return stub
+
+
+@pytest.fixture
+def stub_smart_db(monkeypatch, smart_mod):
+    """Replace the smart tools' database client with a fresh StubDB."""
+    stub = StubDB()
+    monkeypatch.setattr(smart_mod, "db", stub)
+    return stub
+
+
+@pytest.fixture
+def mocked_smart_agent(monkeypatch, smart_mod):
+    """Replace the smart tools' agent with a TaskAgent-shaped mock (async methods are AsyncMocks)."""
+    mock_agent = Mock(spec=TaskAgent)
+    monkeypatch.setattr(smart_mod, "agent", mock_agent)
+    return mock_agent
+
@@ -0,0 +1,246 @@
+"""
+Unit tests for the task agent.
+
+These tests mock the Groq client to test agent logic independently.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from ai.agent import TaskAgent, BatchingTaskParser
+
+
+async def stream_results(results, error=None):
+    """Yield (index, result) pairs like a streamed batch, optionally failing at the end."""
+    for i, result in enumerate(results):
+        yield i, result
+    if error is not None:
+        raise error
+
+
+async def stream_tasks(tasks, error=None):
+    """Yield task dicts like a streamed parse, optionally failing at the end."""
+    for task in tasks:
+        yield task
+    if error is not None:
+        raise error
+
+
+@pytest.fixture
+def agent():
+    """Build a TaskAgent backed by a mocked Groq client."""
+    with patch("ai.agent.get_groq_client", return_value=Mock()):
+        return TaskAgent()
+
+
+class TestParseTaskBatch:
+    """Tests for TaskAgent.parse_task_batch_nl."""
+    
+    def test_batch_uses_single_llm_call(self, agent):
+        """Test that all inputs are parsed by one batched call."""
+        agent.groq_client.parse_tasks_batch_from_nl.return_value = [
+            [{"title": "Buy milk", "priority": "high"}],
+            [{"title": "Call mom"}]
+        ]
+        
+        results = agent.parse_task_batch_nl(["buy milk asap", "call mom"])
+        
+        assert results[0] == [{"title": "Buy milk", "priority": "high"}]
+        assert results[1][0]["title"] == "Call mom"
+        agent.groq_client.parse_tasks_batch_from_nl.assert_called_once()
+    
+    def test_invalid_item_falls_back_to_rule_parser(self, agent):
+        """Test that one bad item does not fail the whole batch."""
+        agent.groq_client.parse_tasks_batch_from_nl.return_value = [
+            [{"title": "Buy milk"}],
+            [{"description": "missing title"}]
+        ]
+        
+        results = agent.parse_task_batch_nl(["buy milk", "call mom"])
+        
+        assert results[0][0]["title"] == "Buy milk"
+        assert results[1][0]["title"] == "Call mom"
+    
+    @pytest.mark.asyncio
+    async def test_async_batch_uses_async_client(self, agent):
+        """Test that the async path consumes the streamed Groq call."""
+        agent.groq_client.parse_tasks_batch_stream_async = Mock(side_effect=lambda texts, current_time: stream_results([
+            [{"title": "Buy milk"}],
+            [{"title": "Call mom"}]
+        ]))
+        
+        results = await agent.parse_task_batch_nl_async(["buy milk", "call mom"])
+        
+        assert [r[0]["title"] for r in results] == ["Buy milk", "Call mom"]
+        agent.groq_client.parse_tasks_batch_from_nl.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_truncated_stream_parses_rest_individually(self, agent):
+        """Test that inputs missing from a failed stream are parsed one by one."""
+        agent.groq_client.parse_tasks_batch_stream_async = Mock(side_effect=lambda texts, current_time: stream_results(
+            [[{"title": "Buy milk"}]],
+            error=ValueError("Expected 2 results from LLM, got 1")
+        ))
+        agent.groq_client.parse_task_from_nl_async = AsyncMock(return_value=[{"title": "Call mom"}])
+        
+        results = [item async for item in agent.iter_task_batch_nl_async(["buy milk", "call mom"])]
+        
+        assert [(i, tasks[0]["title"]) for i, tasks in results] == [(0, "Buy milk"), (1, "Call mom")]
+        agent.groq_client.parse_task_from_nl_async.assert_awaited_once_with("call mom", current_time=None, use_cache=True)
+
+
+class TestIterTaskNl:
+    """Tests for TaskAgent.iter_task_nl_async."""
+    
+    @pytest.mark.asyncio
+    async def test_streamed_tasks_are_validated_and_cached(self, agent):
+        """Test that tasks are yielded as they stream and the full list is cached."""
+        agent.groq_client.parse_task_stream_async = Mock(return_value=stream_tasks([
+            {"title": " Buy milk "}, {"priority": "high"}, {"title": "Call mom"}
+        ]))
+        
+        first = [task async for task in agent.iter_task_nl_async("buy milk, call mom")]
+        second = [task async for task in agent.iter_task_nl_async("buy milk, call mom")]
+        
+        assert [task["title"] for task in first] == ["Buy milk", "Call mom"]
+        assert second == first
+        agent.groq_client.parse_task_stream_async.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_failure_before_any_task_uses_fallback(self, agent):
+        """Test that a stream failing up front falls back to the rule-based parser."""
+        agent.groq_client.parse_task_stream_async = Mock(
+            return_value=stream_tasks([], error=ValueError("bad json"))
+        )
+        
+        tasks = [task async for task in agent.iter_task_nl_async("urgent: fix the sink")]
+        
+        assert len(tasks) == 1
+        assert tasks[0]["priority"] == "high"
+
+
+class TestRuleBasedFastPath:
+    """Tests for commands answered without an LLM call."""
+    
+    @pytest.mark.asyncio
+    async def test_filter_only_search_skips_llm(self, agent):
+        """Test that a plain status listing never reaches Groq."""
+        agent.groq_client.search_query_to_filters_async = AsyncMock()
+        
+        assert await agent.search_tasks_nl_async("show pending tasks") == {"status": "pending"}
+        agent.groq_client.search_query_to_filters_async.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_unrecognized_update_uses_llm(self, agent):
+        """Test that commands outside the fast path still go to Groq."""
+        agent.groq_client.chat_completion_async = AsyncMock(
+            return_value='{"task_match": "report", "updates": {"title": "Q3 report"}}'
+        )
+        
+        update = await agent.extract_task_update_async("rename the report to Q3 report", [])
+        
+        assert update == {"task_match": "report", "updates": {"title": "Q3 report"}}
+        agent.groq_client.chat_completion_async.assert_awaited_once()
+
+
+class TestFindMatchingTask:
+    """Test task lookup by title."""
+    
+    TASKS = [
+        {"id": "1", "title": "Buy groceries"},
+        {"id": "2", "title": "Call mom about dinner"},
+        {"id": "3", "title": "Finish quarterly report"},
+    ]
+    
+    def test_whole_word_match(self, agent):
+        """Test matching on complete words."""
+        assert agent.find_matching_task("groceries", self.TASKS)[0] == "1"
+    
+    def test_partial_word_match(self, agent):
+        """Test substring matching on partial words."""
+        assert agent.find_matching_task("quarter", self.TASKS)[0] == "3"
+    
+    def test_fuzzy_match_on_typo(self, agent):
+        """Test that a misspelled title still resolves."""
+        assert agent.find_matching_task("grocries", self.TASKS)[0] == "1"
+    
+    def test_ambiguous_match_returns_none(self, agent):
+        """Test that equally good matches require clarification."""
+        tasks = [{"id": "1", "title": "Email Bob"}, {"id": "2", "title": "Email Alice"}]
+        assert agent.find_matching_task("email", tasks) == (None, tasks)
+    
+    def test_no_match_returns_none(self, agent):
+        """Test unrelated queries."""
+        assert agent.find_matching_task("walk the dog", self.TASKS)[0] is None
+    
+    def test_match_tasks_is_case_insensitive_substring(self, agent):
+        """Test that match_tasks returns every title containing the query."""
+        tasks = [{"id": "1", "title": "Email Bob"}, {"id": "2", "title": "Call Alice"}, {"id": "3", "title": "EMAIL Alice"}]
+        
+        assert [t["id"] for t in agent.match_tasks("email", tasks)] == ["1", "3"]
+        assert [t["id"] for t in agent.match_tasks("ali", tasks)] == ["2", "3"]
+    
+    def test_whole_word_query_keeps_longer_words(self, agent):
+        """Test that a query word matching a title word still finds titles that only contain it."""
+        tasks = [{"id": "1", "title": "Buy milk"}, {"id": "2", "title": "Buy milkshake"}, {"id": "3", "title": "Reports review"}]
+        
+        assert [t["id"] for t in agent.match_tasks("milk", tasks)] == ["1", "2"]
+        assert [t["id"] for t in agent.match_tasks("report", tasks)] == ["3"]
+        assert [t["id"] for t in agent.match_tasks("buy milk", tasks)] == ["1", "2"]
+        
+        # Two substring hits are ambiguous, not a silent pick of the exact word
+        task_id, matches = agent.find_matching_task("milk", tasks[:2])
+        assert task_id is None
+        assert [t["id"] for t in matches] == ["1", "2"]
+
+
+class TestBatchingTaskParser:
+    """Tests for the asyncio micro-batching layer."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self):
+        """Test that concurrent requests with the same clock share one call."""
+        mock_agent = Mock()
+        mock_agent.iter_task_batch_nl_async = Mock(side_effect=lambda texts, current_time: stream_results([
+            [{"title": text}] for text in texts
+        ]))
+        parser = BatchingTaskParser(mock_agent)
+        
+        results = await asyncio.gather(*(parser.parse(f"task {i}") for i in range(3)))
+        
+        assert results == [[{"title": "task 0"}], [{"title": "task 1"}], [{"title": "task 2"}]]
+        mock_agent.iter_task_batch_nl_async.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_requests_are_grouped_by_current_time(self):
+        """Test that different user clocks never share a prompt."""
+        mock_agent = Mock()
+        mock_agent.iter_task_batch_nl_async = Mock(side_effect=lambda texts, current_time: stream_results([
+            [{"title": text, "due_date": current_time}] for text in texts
+        ]))
+        parser = BatchingTaskParser(mock_agent)
+        
+        results = await asyncio.gather(
+            parser.parse("a", current_time="Mon"),
+            parser.parse("b", current_time="Tue")
+        )
+        
+        assert results[0][0]["due_date"] == "Mon"
+        assert results[1][0]["due_date"] == "Tue"
+        assert mock_agent.iter_task_batch_nl_async.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_callers(self):
+        """Test that a failed batch raises in every waiting caller."""
+        mock_agent = Mock()
+        mock_agent.iter_task_batch_nl_async = Mock(side_effect=lambda texts, current_time: stream_results(
+            [], error=RuntimeError("boom")
+        ))
+        parser = BatchingTaskParser(mock_agent)
+        
+        with pytest.raises(RuntimeError, match="boom"):
+            await parser.parse("a")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
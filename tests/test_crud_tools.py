@@ -5,8 +5,10 @@ These tests mock the database client to test tool logic independently.
 """
 import pytest
 import asyncio
-from unittest.mock import Mock, patch, MagicMock
+import httpx
+from types import MappingProxyType
 from mcp.types import TextContent
+from supabase import PostgrestAPIError
 
 from src.mcp_server.tools.crud import (
     handle_add_task,
@@ -15,122 +17,212 @@ from src.mcp_server.tools.crud import (
     handle_delete_task
 )
 
+# Read-only rows shared by the list tests
+TASK_ROW_1 = MappingProxyType({"id": "123", "title": "Task 1", "status": "pending", "priority": "high"})
+TASK_ROW_2 = MappingProxyType({
+    "id": "456", "title": "Task 2", "status": "completed", "priority": "low", "due_date": "2026-01-05"
+})
+HIGH_PRIORITY_ROW = MappingProxyType({
+    "id": "123", "title": "High Priority Task", "status": "pending", "priority": "high"
+})
 
-class TestAddTask:
-    """Tests for add_task tool."""
-    
-    @pytest.mark.asyncio
-    async def test_add_task_minimal(self):
-        """Test adding a task with only required fields."""
-        mock_db = Mock()
-        mock_db.create_task.return_value = {
+# (arguments, row returned by the database, text expected in the reply)
+ADD_CASES = [
+    pytest.param(
+        {"title": "Test Task"},
+        {
             "id": "123e4567-e89b-12d3-a456-426614174000",
             "title": "Test Task",
             "priority": "medium",
             "status": "pending"
-        }
-        
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_add_task({"title": "Test Task"})
-            
-            assert len(result) == 1
-            assert isinstance(result[0], TextContent)
-            assert "✅ Task created successfully!" in result[0].text
-            assert "Test Task" in result[0].text
-            mock_db.create_task.assert_called_once()
-    
-    @pytest.mark.asyncio
-    async def test_add_task_full(self):
-        """Test adding a task with all fields."""
-        mock_db = Mock()
-        mock_db.create_task.return_value = {
-            "id": "123e4567-e89b-12d3-a456-426614174000",
+        },
+        ["Test Task"],
+        id="minimal"
+    ),
+    pytest.param(
+        {
             "title": "Complete Project",
             "description": "Finish the MCP todo project",
             "priority": "high",
-            "status": "pending",
             "category": "work",
-            "tags": ["urgent", "project"]
-        }
-        
-        arguments = {
+            "tags": ["urgent", "project"],
+            "due_date": "2026-01-10T17:00:00"
+        },
+        {
+            "id": "123e4567-e89b-12d3-a456-426614174000",
             "title": "Complete Project",
             "description": "Finish the MCP todo project",
             "priority": "high",
+            "status": "pending",
             "category": "work",
-            "tags": ["urgent", "project"],
-            "due_date": "2026-01-10T17:00:00"
-        }
+            "tags": ["urgent", "project"]
+        },
+        ["Complete Project", "high"],
+        id="full"
+    ),
+]
+
+# (arguments, row returned by the database, updates expected by the database)
+UPDATE_CASES = [
+    pytest.param(
+        {"task_id": "123", "status": "completed"},
+        {"id": "123", "title": "Updated Task", "status": "completed", "priority": "medium"},
+        {"status": "completed"},
+        id="single-field"
+    ),
+    pytest.param(
+        {"task_id": "123", "title": "New Title", "status": "in_progress", "priority": "high"},
+        {"id": "123", "title": "New Title", "status": "in_progress", "priority": "high"},
+        {"title": "New Title", "status": "in_progress", "priority": "high"},
+        id="multiple-fields"
+    ),
+]
+
+# Tool name -> handler, so tables can name the tool instead of importing it
+HANDLERS = {
+    "add_task": handle_add_task,
+    "list_tasks": handle_list_tasks,
+    "update_task": handle_update_task,
+    "delete_task": handle_delete_task,
+}
+
+# (tool name, arguments, text expected in the reply) for inputs rejected before any query
+ERROR_CASES = [
+    pytest.param("update_task", {"task_id": "123"}, "No updates provided", id="update-no-fields"),
+    pytest.param(
+        "update_task", {"task_id": "123", "title": None, "priority": None}, "No updates provided",
+        id="update-only-nulls"
+    ),
+]
+
+
+class TestAddTask:
+    """Tests for add_task tool."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("arguments,db_return,expected_text", ADD_CASES)
+    async def test_add_task(self, stub_crud_db, arguments, db_return, expected_text):
+        """Test adding a task and passing the provided fields to the database."""
+        stub_crud_db.returns["create_task"] = db_return
+        
+        result = await handle_add_task(arguments)
+        
+        assert len(result) == 1
+        text = result[0].text
+        assert "✅ Task created successfully!" in text
+        for expected in expected_text:
+            assert expected in text
+        assert len(stub_crud_db.called("create_task")) == 1
+        
+        # Verify database was called with correct data
+        call_args = stub_crud_db.called("create_task")[0][0][0]
+        assert call_args["title"] == arguments["title"]
+        assert call_args["priority"] == arguments.get("priority", "medium")
+        assert call_args.get("due_date") == arguments.get("due_date")
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_adds_share_one_insert(self, stub_crud_db):
+        """Test that adds arriving together are written with one multi-row insert."""
+        stub_crud_db.returns["create_tasks"] = lambda rows: [
+            {**row, "id": str(i)} for i, row in enumerate(rows)
+        ]
+        
+        results = await asyncio.gather(*(
+            handle_add_task({"title": title}) for title in ("A", "B", "C")
+        ))
+        
+        assert len(stub_crud_db.called("create_tasks")) == 1
+        assert [row["title"] for row in stub_crud_db.called("create_tasks")[0][0][0]] == ["A", "B", "C"]
+        assert all(f"ID: {i}\n" in result[0].text for i, result in enumerate(results))
+        assert stub_crud_db.called("create_task") == []
+    
+    @pytest.mark.asyncio
+    async def test_failed_batch_retries_rows_individually(self, stub_crud_db):
+        """Test that one invalid row only fails its own add_task call."""
+        stub_crud_db.returns["create_tasks"] = PostgrestAPIError(
+            {"code": "23502", "message": "null value in column title"}
+        )
+        
+        async def create_task(row):
+            if not row["title"]:
+                raise RuntimeError("null value in column title")
+            return {**row, "id": "42"}
+        
+        stub_crud_db.returns["create_task"] = create_task
+        
+        good, bad = await asyncio.gather(
+            handle_add_task({"title": "Valid"}),
+            handle_add_task({"title": ""}),
+            return_exceptions=True
+        )
+        
+        assert "ID: 42" in good[0].text
+        assert isinstance(bad, RuntimeError)
+        assert len(stub_crud_db.called("create_task")) == 2
+    
+    @pytest.mark.asyncio
+    async def test_timed_out_batch_is_not_reinserted(self, stub_crud_db):
+        """Test that a transport error fails the whole batch instead of retrying rows."""
+        stub_crud_db.returns["create_tasks"] = httpx.ReadTimeout("timed out")
+        
+        results = await asyncio.gather(
+            handle_add_task({"title": "A"}),
+            handle_add_task({"title": "B"}),
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(result, httpx.ReadTimeout) for result in results)
+        assert len(stub_crud_db.called("create_tasks")) == 1
+        assert stub_crud_db.called("create_task") == []
+    
+    @pytest.mark.asyncio
+    async def test_short_batch_reply_is_not_reinserted(self, stub_crud_db):
+        """Test that a committed batch with a missing row fails callers instead of inserting again."""
+        stub_crud_db.returns["create_tasks"] = lambda rows: [{**rows[0], "id": "1"}]
+        
+        results = await asyncio.gather(
+            handle_add_task({"title": "A"}),
+            handle_add_task({"title": "B"}),
+            return_exceptions=True
+        )
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_add_task(arguments)
-            
-            assert len(result) == 1
-            assert "Complete Project" in result[0].text
-            assert "high" in result[0].text
-            
-            # Verify database was called with correct data
-            call_args = mock_db.create_task.call_args[0][0]
-            assert call_args["title"] == "Complete Project"
-            assert call_args["priority"] == "high"
-            assert call_args["due_date"] == "2026-01-10T17:00:00"
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert len(stub_crud_db.called("create_tasks")) == 1
+        assert stub_crud_db.called("create_task") == []
 
 
 class TestListTasks:
     """Tests for list_tasks tool."""
     
     @pytest.mark.asyncio
-    async def test_list_tasks_empty(self):
+    async def test_list_tasks_empty(self, stub_crud_db):
         """Test listing tasks when none exist."""
-        mock_db = Mock()
-        mock_db.list_tasks.return_value = []
-        
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_list_tasks({})
-            
-            assert len(result) == 1
-            assert "No tasks found" in result[0].text
+        stub_crud_db.returns["list_tasks"] = []
+        
+        result = await handle_list_tasks({})
+        
+        # Reply-shape contract for the CRUD handlers; other tests only check the text
+        assert len(result) == 1
+        assert isinstance(result[0], TextContent)
+        assert "No tasks found" in result[0].text
     
     @pytest.mark.asyncio
-    async def test_list_tasks_with_results(self):
+    async def test_list_tasks_with_results(self, stub_crud_db):
         """Test listing tasks with results."""
-        mock_db = Mock()
-        mock_db.list_tasks.return_value = [
-            {
-                "id": "123",
-                "title": "Task 1",
-                "status": "pending",
-                "priority": "high"
-            },
-            {
-                "id": "456",
-                "title": "Task 2",
-                "status": "completed",
-                "priority": "low",
-                "due_date": "2026-01-05"
-            }
-        ]
+        stub_crud_db.returns["list_tasks"] = [TASK_ROW_1, TASK_ROW_2]
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_list_tasks({})
-            
-            assert len(result) == 1
-            assert "Found 2 task(s)" in result[0].text
-            assert "Task 1" in result[0].text
-            assert "Task 2" in result[0].text
+        result = await handle_list_tasks({})
+        
+        assert len(result) == 1
+        text = result[0].text
+        assert "Found 2 task(s)" in text
+        assert "Task 1" in text
+        assert "Task 2" in text
     
     @pytest.mark.asyncio
-    async def test_list_tasks_with_filters(self):
+    async def test_list_tasks_with_filters(self, stub_crud_db):
         """Test listing tasks with status and priority filters."""
-        mock_db = Mock()
-        mock_db.list_tasks.return_value = [
-            {
-                "id": "123",
-                "title": "High Priority Task",
-                "status": "pending",
-                "priority": "high"
-            }
-        ]
+        stub_crud_db.returns["list_tasks"] = [HIGH_PRIORITY_ROW]
         
         arguments = {
             "status": "pending",
@@ -138,112 +230,68 @@ class TestListTasks:
             "limit": 50
         }
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_list_tasks(arguments)
-            
-            mock_db.list_tasks.assert_called_once_with(
-                status="pending",
-                priority="high",
-                limit=50
-            )
-            assert "High Priority Task" in result[0].text
+        result = await handle_list_tasks(arguments)
+        
+        assert stub_crud_db.calls == [
+            ("list_tasks", (), {"status": "pending", "priority": "high", "limit": 50})
+        ]
+        assert "High Priority Task" in result[0].text
 
 
 class TestUpdateTask:
     """Tests for update_task tool."""
     
     @pytest.mark.asyncio
-    async def test_update_task_single_field(self):
-        """Test updating a single field."""
-        mock_db = Mock()
-        mock_db.update_task.return_value = {
-            "id": "123",
-            "title": "Updated Task",
-            "status": "completed",
-            "priority": "medium"
-        }
-        
-        arguments = {
-            "task_id": "123",
-            "status": "completed"
-        }
-        
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_update_task(arguments)
-            
-            assert len(result) == 1
-            assert "✅ Task updated successfully!" in result[0].text
-            mock_db.update_task.assert_called_once_with("123", {"status": "completed"})
-    
-    @pytest.mark.asyncio
-    async def test_update_task_multiple_fields(self):
-        """Test updating multiple fields."""
-        mock_db = Mock()
-        mock_db.update_task.return_value = {
-            "id": "123",
-            "title": "New Title",
-            "status": "in_progress",
-            "priority": "high"
-        }
-        
-        arguments = {
-            "task_id": "123",
-            "title": "New Title",
-            "status": "in_progress",
-            "priority": "high"
-        }
-        
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_update_task(arguments)
-            
-            call_args = mock_db.update_task.call_args[0][1]
-            assert call_args["title"] == "New Title"
-            assert call_args["status"] == "in_progress"
-            assert call_args["priority"] == "high"
-    
-    @pytest.mark.asyncio
-    async def test_update_task_no_updates(self):
-        """Test update with no fields provided."""
-        mock_db = Mock()
+    @pytest.mark.parametrize("arguments,db_return,expected_updates", UPDATE_CASES)
+    async def test_update_task(self, stub_crud_db, arguments, db_return, expected_updates):
+        """Test that only the provided fields are sent as updates."""
+        stub_crud_db.returns["update_task"] = db_return
         
-        arguments = {"task_id": "123"}
+        result = await handle_update_task(arguments)
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_update_task(arguments)
-            
-            assert "No updates provided" in result[0].text
-            mock_db.update_task.assert_not_called()
+        assert len(result) == 1
+        assert "✅ Task updated successfully!" in result[0].text
+        assert stub_crud_db.called("update_task") == [(("123", expected_updates), {})]
 
 
 class TestDeleteTask:
     """Tests for delete_task tool."""
     
     @pytest.mark.asyncio
-    async def test_delete_task_success(self):
+    async def test_delete_task_success(self, stub_crud_db):
         """Test successful task deletion."""
-        mock_db = Mock()
-        mock_db.delete_task.return_value = True
+        stub_crud_db.returns["delete_task"] = True
         
         arguments = {"task_id": "123"}
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            result = await handle_delete_task(arguments)
-            
-            assert len(result) == 1
-            assert "✅ Task 123 deleted successfully!" in result[0].text
-            mock_db.delete_task.assert_called_once_with("123")
+        result = await handle_delete_task(arguments)
+        
+        assert len(result) == 1
+        assert "✅ Task 123 deleted successfully!" in result[0].text
+        assert stub_crud_db.calls == [("delete_task", ("123",), {})]
     
     @pytest.mark.asyncio
-    async def test_delete_task_error(self):
+    async def test_delete_task_error(self, stub_crud_db):
         """Test task deletion with error."""
-        mock_db = Mock()
-        mock_db.delete_task.side_effect = ValueError("Task not found")
+        stub_crud_db.returns["delete_task"] = ValueError("Task not found")
         
         arguments = {"task_id": "nonexistent"}
         
-        with patch("src.mcp_server.tools.crud.db", mock_db):
-            with pytest.raises(ValueError, match="Task not found"):
-                await handle_delete_task(arguments)
+        with pytest.raises(ValueError, match="Task not found"):
+            await handle_delete_task(arguments)
+
+
+class TestErrorPaths:
+    """Tests for handler inputs that are answered without touching the database."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tool,arguments,expected", ERROR_CASES)
+    async def test_error_paths(self, stub_crud_db, tool, arguments, expected):
+        """Test that the handler replies with the expected message and makes no query."""
+        result = await HANDLERS[tool](arguments)
+        
+        assert expected in result[0].text
+        assert stub_crud_db.calls == []
 
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+"""
+Unit tests for the Groq client response cache.
+
+These tests mock the Groq SDK client so no API calls are made.
+"""
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from ai import groq_client
+from ai.groq_client import GroqClient, LLMCache
+
+
+def make_client(content: str = '{"priority": "high"}') -> GroqClient:
+    """Build a GroqClient whose SDK client returns a fixed completion."""
+    with patch.dict("os.environ", {"GROQ_API_KEY": "test-key"}):
+        client = GroqClient()
+    
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=content))]
+    response.usage.total_tokens = 42
+    client.client = Mock()
+    client.client.chat.completions.create.return_value = response
+    client.async_client = Mock()
+    client.async_client.chat.completions.create = AsyncMock(return_value=response)
+    return client
+
+
+class TestLLMCache:
+    """Tests for the LLMCache LRU/TTL behaviour."""
+    
+    def test_cache_key_is_order_independent(self):
+        """Test that dict ordering does not change the key."""
+        messages = [{"role": "user", "content": "hi"}]
+        key_a = LLMCache.cache_key("model", messages, 0.3, 1024)
+        key_b = LLMCache.cache_key("model", [{"content": "hi", "role": "user"}], 0.3, 1024)
+        
+        assert key_a == key_b
+        assert key_a != LLMCache.cache_key("model", messages, 0.3, 512)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = LLMCache(maxsize=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+    
+    def test_expired_entry_is_a_miss(self):
+        """Test that entries older than the TTL are not returned."""
+        cache = LLMCache(ttl=0)
+        cache.set("a", "1")
+        
+        assert cache.get("a") is None
+        assert cache.stats == {"hits": 0, "misses": 1}
+    
+    def test_entries_shared_through_database(self, tmp_path):
+        """Test that a second cache on the same database sees stored responses."""
+        db_path = str(tmp_path / "cache.db")
+        writer = LLMCache(db_path=db_path)
+        reader = LLMCache(db_path=db_path)
+        
+        writer.set("key", "value")
+        
+        assert reader.get("key") == "value"
+        assert reader.get("other") is None
+    
+    def test_expired_database_entry_is_a_miss(self, tmp_path):
+        """Test that persisted entries honour the TTL."""
+        db_path = str(tmp_path / "cache.db")
+        LLMCache(db_path=db_path).set("key", "value")
+        
+        assert LLMCache(ttl=0.0, db_path=db_path).get("key") is None
+
+
+class TestChatCompletionCache:
+    """Tests for caching inside GroqClient.chat_completion."""
+    
+    def test_deterministic_call_is_cached(self):
+        """Test that a repeated low-temperature call skips the API."""
+        client = make_client()
+        messages = [{"role": "user", "content": "Show high priority tasks"}]
+        
+        first = client.chat_completion(messages, temperature=0.3)
+        second = client.chat_completion(messages, temperature=0.3)
+        
+        assert first == second == '{"priority": "high"}'
+        client.client.chat.completions.create.assert_called_once()
+        assert client._cache.stats == {"hits": 1, "misses": 1}
+    
+    def test_high_temperature_is_not_cached(self):
+        """Test that sampling calls always reach the API."""
+        client = make_client()
+        messages = [{"role": "user", "content": "Write a haiku"}]
+        
+        client.chat_completion(messages, temperature=0.7)
+        client.chat_completion(messages, temperature=0.7)
+        
+        assert client.client.chat.completions.create.call_count == 2
+    
+    def test_tool_calls_are_not_cached(self):
+        """Test that requests with tool params bypass the cache."""
+        client = make_client()
+        messages = [{"role": "user", "content": "hi"}]
+        
+        client.chat_completion(messages, temperature=0, tools=[])
+        client.chat_completion(messages, temperature=0, tools=[])
+        
+        assert client.client.chat.completions.create.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_async_completion_shares_cache(self):
+        """Test that sync and async calls hit the same cache."""
+        client = make_client()
+        messages = [{"role": "user", "content": "hi"}]
+        
+        first = await client.chat_completion_async(messages, temperature=0.3)
+        second = client.chat_completion(messages, temperature=0.3)
+        
+        assert first == second == '{"priority": "high"}'
+        client.async_client.chat.completions.create.assert_awaited_once()
+        client.client.chat.completions.create.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_use_cache_false_bypasses_cache(self):
+        """Test that use_cache=False neither reads nor writes the cache."""
+        client = make_client()
+        messages = [{"role": "user", "content": "hi"}]
+        
+        await client.chat_completion_async(messages, temperature=0.3)
+        await client.chat_completion_async(messages, temperature=0.3, use_cache=False)
+        
+        assert client.async_client.chat.completions.create.await_count == 2
+        assert "use_cache" not in client.async_client.chat.completions.create.call_args.kwargs
+
+
+class TestStreaming:
+    """Tests for streamed completions."""
+    
+    @staticmethod
+    def stream_of(*pieces):
+        """Build an async iterator of SDK-style stream chunks."""
+        async def stream():
+            for piece in pieces:
+                yield Mock(choices=[Mock(delta=Mock(content=piece))])
+        return stream()
+    
+    @pytest.mark.asyncio
+    async def test_batch_items_yielded_incrementally(self):
+        """Test that each input's result is yielded before the stream ends."""
+        client = make_client()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of(
+            '[[{"title": "A"}]', ', {"title": "B"}', "]"
+        ))
+        
+        results = [item async for item in client.parse_tasks_batch_stream_async(["a", "b"])]
+        
+        assert results == [(0, [{"title": "A"}]), (1, [{"title": "B"}])]
+    
+    @pytest.mark.asyncio
+    async def test_completed_stream_is_cached(self):
+        """Test that a replayed stream comes from the cache."""
+        client = make_client()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of("he", "llo"))
+        messages = [{"role": "user", "content": "hi"}]
+        
+        first = [piece async for piece in client.chat_completion_stream_async(messages, temperature=0)]
+        second = [piece async for piece in client.chat_completion_stream_async(messages, temperature=0)]
+        
+        assert first == ["he", "llo"]
+        assert second == ["hello"]
+        client.async_client.chat.completions.create.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_task_objects_yielded_incrementally(self):
+        """Test that each task in a single parse is yielded once its object closes."""
+        client = make_client()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of(
+            '[{"title": "A", "tags": ["x"]}', ', {"title": "B"}]'
+        ))
+        
+        results = [item async for item in client.parse_task_stream_async("a and b")]
+        
+        assert results == [{"title": "A", "tags": ["x"]}, {"title": "B"}]
+    
+    @pytest.mark.asyncio
+    async def test_bare_object_stream_is_parsed_whole(self):
+        """Test that a single-object reply still yields one task."""
+        client = make_client()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of(
+            '{"title": "A", ', '"tags": ["x", "y"]}'
+        ))
+        
+        results = [item async for item in client.parse_task_stream_async("a")]
+        
+        assert results == [{"title": "A", "tags": ["x", "y"]}]
+    
+    @pytest.mark.asyncio
+    async def test_short_batch_raises(self):
+        """Test that a response with too few results raises after yielding what it has."""
+        client = make_client()
+        client.async_client.chat.completions.create = AsyncMock(return_value=self.stream_of('[[{"title": "A"}]]'))
+        results = []
+        
+        with pytest.raises(ValueError, match="Expected 2 results"):
+            async for item in client.parse_tasks_batch_stream_async(["a", "b"]):
+                results.append(item)
+        
+        assert results == [(0, [{"title": "A"}])]
+
+
+class TestSharedHttpClients:
+    """Tests for the process-wide Groq HTTP connection pool."""
+    
+    @pytest.mark.asyncio
+    async def test_aclose_closes_and_resets_pool(self):
+        """Test that shutdown closes both clients and the next call builds new ones."""
+        with patch.object(groq_client, "_http_clients", None):
+            sync_client, async_client = groq_client._get_http_clients()
+            assert groq_client._get_http_clients() == (sync_client, async_client)
+            
+            await groq_client.aclose_http_clients()
+            
+            assert sync_client.is_closed and async_client.is_closed
+            assert groq_client._http_clients is None
+            await groq_client.aclose_http_clients()
+    
+    @pytest.mark.asyncio
+    async def test_client_rebinds_after_aclose(self):
+        """Test that an existing GroqClient moves to the new pool instead of the closed one."""
+        with patch.object(groq_client, "_http_clients", None), \
+                patch.dict("os.environ", {"GROQ_API_KEY": "test-key"}):
+            client = GroqClient()
+            old_async_client = client.async_client
+            
+            await groq_client.aclose_http_clients()
+            
+            assert client.async_client is not old_async_client
+            assert not client.async_client._client.is_closed
+            assert not client.client._client.is_closed
+            await groq_client.aclose_http_clients()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
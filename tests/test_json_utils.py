@@ -0,0 +1,73 @@
+"""
+Unit tests for JSON extraction from LLM responses.
+"""
+import pytest
+
+from ai.json_utils import ArrayItemParser, extract_first_json, parse_json_from_text
+
+
+class TestExtractFirstJson:
+    """Tests for the single-pass bracket scanner."""
+    
+    def test_ignores_brackets_inside_strings(self):
+        """Test that braces in string literals do not end the value."""
+        text = 'Result: {"title": "fix } and ]", "tags": ["a"]} trailing }'
+        
+        assert extract_first_json(text) == '{"title": "fix } and ]", "tags": ["a"]}'
+    
+    def test_handles_escaped_quotes(self):
+        """Test that escaped quotes keep the scanner inside the string."""
+        text = '[{"title": "say \\"hi\\" {"}]'
+        
+        assert extract_first_json(text) == text
+    
+    def test_no_json(self):
+        """Test that plain prose yields None."""
+        assert extract_first_json("no structured data here") is None
+
+
+class TestParseJsonFromText:
+    """Tests for parse_json_from_text."""
+    
+    def test_markdown_fence(self):
+        """Test parsing JSON wrapped in a Markdown code block."""
+        text = 'Here you go:\n```json\n[{"title": "Buy milk"}]\n```'
+        
+        assert parse_json_from_text(text) == [{"title": "Buy milk"}]
+    
+    def test_skips_invalid_candidates(self):
+        """Test that a bracketed non-JSON phrase is skipped."""
+        text = 'Parsed [the] request: {"priority": "high"}'
+        
+        assert parse_json_from_text(text) == {"priority": "high"}
+    
+    def test_raises_when_missing(self):
+        """Test that text without JSON raises ValueError."""
+        with pytest.raises(ValueError):
+            parse_json_from_text("Sorry, I can't help with that.")
+
+
+class TestArrayItemParser:
+    """Tests for incremental array decoding."""
+    
+    def test_items_emitted_as_they_complete(self):
+        """Test that each element is returned by the chunk that closes it."""
+        parser = ArrayItemParser()
+        
+        assert parser.feed('```json\n[[{"title": "a]"}], {"t') == [[{"title": "a]"}]]
+        assert parser.feed('": "b"}, 3') == [{"t": "b"}]
+        assert parser.feed(', "x,y"]\n```') == [3, "x,y"]
+        assert parser.done
+    
+    def test_character_by_character(self):
+        """Test that arbitrary chunk boundaries give the same elements."""
+        text = '[{"title": "say \\"hi\\""}, [], null]'
+        parser = ArrayItemParser()
+        
+        items = [item for char in text for item in parser.feed(char)]
+        
+        assert items == [{"title": 'say "hi"'}, [], None]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,29 @@
+"""
+Unit tests for the task Pydantic models.
+"""
+import pytest
+from pydantic import ValidationError
+
+from src.mcp_server.models import TaskCreate, TaskUpdate
+
+
+class TestTaskModels:
+    """Tests for the enum fields."""
+    
+    def test_status_and_priority_defaults(self):
+        """Test that new tasks default to pending/medium."""
+        task = TaskCreate(title="Buy milk")
+        
+        assert task.status == "pending"
+        assert task.priority == "medium"
+    
+    def test_unknown_enum_values_rejected(self):
+        """Test that status and priority only accept known values."""
+        with pytest.raises(ValidationError):
+            TaskCreate(title="Buy milk", status="done")
+        with pytest.raises(ValidationError):
+            TaskUpdate(priority="urgent")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
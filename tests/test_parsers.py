@@ -0,0 +1,134 @@
+"""
+Unit tests for the rule-based fallback parsers.
+"""
+import pytest
+from unittest.mock import patch
+
+from ai import parsers
+from ai.parsers import (
+    extract_priority, infer_category, extract_tags, parse_task_metadata, validate_task_data,
+    parse_search_filters, parse_update_command
+)
+
+
+@pytest.fixture(params=["automaton", "linear"])
+def scan_mode(request):
+    """Run each test with and without the Aho-Corasick automaton."""
+    if request.param == "linear":
+        with patch.object(parsers, "_AUTOMATON", None):
+            yield request.param
+    else:
+        if parsers._AUTOMATON is None:
+            pytest.skip("pyahocorasick not installed")
+        yield request.param
+
+
+class TestKeywordScan:
+    """Tests for priority, category and tag extraction."""
+    
+    def test_high_priority_wins_over_low(self, scan_mode):
+        """Test that high-priority keywords take precedence."""
+        assert extract_priority("urgent but low effort") == "high"
+        assert extract_priority("someday maybe") == "low"
+        assert extract_priority("water plants") == "medium"
+    
+    def test_first_category_in_table_order(self, scan_mode):
+        """Test that the earliest matching category is chosen."""
+        assert infer_category("buy a gift for the work party") == "work"
+        assert infer_category("pay the electricity bill") == "finance"
+        assert infer_category("water plants") is None
+    
+    def test_shared_keyword_sets_priority_and_tag(self, scan_mode):
+        """Test that one keyword feeds every field it belongs to."""
+        metadata = parse_task_metadata("asap fix the sink, quick job")
+        
+        assert metadata["priority"] == "high"
+        assert metadata["category"] == "home"
+        assert metadata["tags"] == ["urgent", "quick"]
+    
+    def test_tags_keep_table_order(self, scan_mode):
+        """Test that tags come out in keyword-table order without duplicates."""
+        assert extract_tags("quick daily urgent asap check") == ["urgent", "recurring", "quick"]
+
+
+class TestDueDate:
+    """Tests for due-date extraction in the fallback parser."""
+    
+    @pytest.mark.parametrize("text,time_of_day", [
+        ("Meet Jason at 5pm", "T17:00:00"),
+        ("Buy lemon at 6pm", "T18:00:00"),
+        ("Call mom on monday at 5pm", "T17:00:00"),
+    ])
+    def test_time_phrase_is_not_swallowed(self, text, time_of_day):
+        """Test that "on" inside a word or before a time does not hide the time."""
+        assert parse_task_metadata(text)["due_date"].endswith(time_of_day)
+
+
+@pytest.fixture(params=["schema", "lenient"])
+def validate_mode(request):
+    """Run each test with and without the compiled schema validator."""
+    if request.param == "lenient":
+        with patch.object(parsers, "_VALIDATE_TASK", None):
+            yield request.param
+    else:
+        if parsers._VALIDATE_TASK is None:
+            pytest.skip("fastjsonschema not installed")
+        yield request.param
+
+
+class TestValidateTaskData:
+    """Tests for LLM output validation."""
+    
+    def test_well_formed_task(self, validate_mode):
+        """Test cleaning of a task that matches the schema."""
+        task = {"title": " Buy milk ", "tags": ["shop", ""], "due_date": "2026-01-03/2026-01-04"}
+        
+        assert validate_task_data(task) == {
+            "title": "Buy milk",
+            "priority": "medium",
+            "tags": ["shop"],
+            "due_date": "2026-01-03"
+        }
+        assert "priority" not in task
+    
+    def test_loose_values_are_coerced(self, validate_mode):
+        """Test that off-schema values are normalized instead of rejected."""
+        task = {"title": 42, "priority": "HIGH", "status": "done", "description": None}
+        
+        assert validate_task_data(task) == {"title": "42", "priority": "high"}
+    
+    def test_missing_title_raises(self, validate_mode):
+        """Test that a task without a title is rejected."""
+        with pytest.raises(ValueError, match="title is required"):
+            validate_task_data({"priority": "high"})
+
+
+
+class TestRuleBasedCommands:
+    """Tests for the regex fast paths in front of the LLM."""
+    
+    def test_filter_only_search(self):
+        """Test that plain status/priority listings are parsed directly."""
+        assert parse_search_filters("Show me all high priority tasks") == {"priority": "high"}
+        assert parse_search_filters("list in progress tasks") == {"status": "in_progress"}
+        assert parse_search_filters("show me low-priority done todos.") == {"priority": "low", "status": "completed"}
+    
+    def test_search_needing_llm_returns_none(self):
+        """Test that free text or contradictory filters fall through to the LLM."""
+        assert parse_search_filters("Find tasks about groceries") is None
+        assert parse_search_filters("What tasks are completed?") is None
+        assert parse_search_filters("show pending completed tasks") is None
+    
+    def test_simple_updates(self):
+        """Test status and priority changes on a named task."""
+        assert parse_update_command("Mark the groceries task as done") == {
+            "task_match": "groceries", "updates": {"status": "completed"}
+        }
+        assert parse_update_command("Change the meeting priority to high") == {
+            "task_match": "meeting", "updates": {"priority": "high"}
+        }
+        assert parse_update_command("Change the title of meeting to Standup") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,159 @@
+"""
+Unit tests for the semantic cache.
+
+The sentence-transformer model is replaced with a deterministic fake encoder.
+"""
+import pytest
+from unittest.mock import patch
+
+np = pytest.importorskip("numpy")
+
+from ai import semantic_cache
+from ai.semantic_cache import SemanticCache, EMBEDDING_DIM
+
+
+class FakeEncoder:
+    """Maps known phrases onto fixed unit vectors."""
+    
+    VECTORS = {
+        "buy milk tomorrow": 0,
+        "get milk tomorrow": 0,
+        "call mom": 1
+    }
+    
+    def encode(self, text, normalize_embeddings=True):
+        vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+        vector[self.VECTORS.get(text, 2)] = 1.0
+        return vector
+
+
+@pytest.fixture
+def cache_factory():
+    """Build enabled caches backed by the fake encoder."""
+    with patch.object(semantic_cache, "_get_encoder", return_value=FakeEncoder()), \
+         patch.object(semantic_cache, "semantic_cache_available", return_value=True):
+        yield lambda **kwargs: SemanticCache("test", **kwargs)
+
+
+class TestSemanticCache:
+    """Tests for SemanticCache lookups and eviction."""
+    
+    def test_similar_text_hits(self, cache_factory):
+        """Test that a rephrased input returns the cached payload."""
+        cache = cache_factory()
+        cache.set("buy milk tomorrow", [{"title": "Buy milk"}])
+        
+        assert cache.get("get milk tomorrow") == [{"title": "Buy milk"}]
+        assert cache.get("call mom") is None
+        assert cache.stats == {"hits": 1, "misses": 1}
+    
+    def test_context_must_match(self, cache_factory):
+        """Test that entries are only reused for the same context."""
+        cache = cache_factory()
+        cache.set("buy milk tomorrow", [{"title": "Buy milk"}], context="Mon 9:00")
+        
+        assert cache.get("buy milk tomorrow", context="Tue 9:00") is None
+        assert cache.get("buy milk tomorrow", context="Mon 9:00") == [{"title": "Buy milk"}]
+    
+    def test_hits_return_copies(self, cache_factory):
+        """Test that mutating a hit does not corrupt the cache."""
+        cache = cache_factory()
+        cache.set("call mom", {"search_text": "mom"})
+        
+        cache.get("call mom")["search_text"] = "changed"
+        
+        assert cache.get("call mom") == {"search_text": "mom"}
+    
+    def test_lru_eviction(self, cache_factory):
+        """Test that the least recently used entry is overwritten when full."""
+        cache = cache_factory(maxsize=2)
+        cache.set("buy milk tomorrow", "milk")
+        cache.set("call mom", "mom")
+        cache.get("buy milk tomorrow")
+        cache.set("something else", "other")
+        
+        assert cache.get("buy milk tomorrow") == "milk"
+        assert cache.get("call mom") is None
+    
+    def test_entries_persist_across_instances(self, cache_factory, tmp_path):
+        """Test that a new cache starts warm from the shared database."""
+        db_path = str(tmp_path / "cache.db")
+        cache = cache_factory(db_path=db_path)
+        cache.set("call mom", {"search_text": "mom"})
+        
+        restored = cache_factory(db_path=db_path)
+        
+        assert restored.get("call mom") == {"search_text": "mom"}
+    
+    def test_entries_shared_between_live_instances(self, cache_factory, tmp_path):
+        """Test that entries written by another process are picked up on lookup."""
+        db_path = str(tmp_path / "cache.db")
+        first = cache_factory(db_path=db_path)
+        second = cache_factory(db_path=db_path)
+        
+        first.set("buy milk tomorrow", "milk")
+        
+        assert second.get("get milk tomorrow") == "milk"
+        assert len(first._payloads) == 1
+    
+    def test_exact_repeat_skips_embedding(self, cache_factory):
+        """Test that a repeated input is answered without encoding it again."""
+        cache = cache_factory()
+        cache.set("buy milk tomorrow", [{"title": "Buy milk"}])
+        
+        with patch.object(cache, "_encode", side_effect=AssertionError("encoded")):
+            assert cache.get("  buy milk   tomorrow") == [{"title": "Buy milk"}]
+    
+    def test_exact_tier_without_embeddings(self):
+        """Test that exact repeats still hit when the embedding packages are missing."""
+        with patch.object(semantic_cache, "semantic_cache_available", return_value=False):
+            cache = SemanticCache("test")
+        cache.set("buy milk tomorrow", [{"title": "Buy milk"}], context="Mon 9:00")
+        
+        assert cache.get("buy milk tomorrow", context="Mon 9:00") == [{"title": "Buy milk"}]
+        assert cache.get("buy milk tomorrow", context="Tue 9:00") is None
+        assert cache.get("get milk tomorrow", context="Mon 9:00") is None
+
+
+class RandomEncoder:
+    """Maps "item N" onto a reproducible random unit vector."""
+    
+    def encode(self, text, normalize_embeddings=True):
+        rng = np.random.default_rng(int(text.split()[-1]))
+        vector = rng.standard_normal(EMBEDDING_DIM).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+class TestFaissIndex:
+    """Tests for the FAISS-backed lookup path."""
+    
+    @pytest.fixture
+    def indexed_cache(self):
+        pytest.importorskip("faiss")
+        with patch.object(semantic_cache, "_get_encoder", return_value=RandomEncoder()), \
+             patch.object(semantic_cache, "semantic_cache_available", return_value=True):
+            yield SemanticCache("test", index_min_entries=256)
+    
+    def test_index_built_at_threshold(self, indexed_cache):
+        """Test that lookups switch to the index once enough entries exist."""
+        for i in range(255):
+            indexed_cache.set(f"item {i}", i)
+        assert indexed_cache._index is None
+        
+        indexed_cache.set("item 255", 255)
+        
+        assert indexed_cache._index is not None
+        assert all(indexed_cache.get(f"item {i}") == i for i in range(0, 256, 17))
+    
+    def test_entries_after_build_are_found(self, indexed_cache):
+        """Test that inserts since the last build are scanned exactly."""
+        for i in range(300):
+            indexed_cache.set(f"item {i}", i)
+        
+        assert indexed_cache._delta
+        assert indexed_cache.get("item 299") == 299
+        assert indexed_cache.get("item 1000") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,7 +4,7 @@ Unit tests for AI-powered smart tools.
 These tests mock the AI agent to test tool logic independently.
 """
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+from types import MappingProxyType
 from mcp.types import TextContent
 
 from src.mcp_server.tools.smart import (
@@ -13,26 +13,54 @@ from src.mcp_server.tools.smart import (
     handle_smart_update
 )
 
+# Read-only rows shared by the search and update tests
+GROCERIES_ROW = MappingProxyType({"id": "123", "title": "Buy groceries", "status": "pending", "priority": "medium"})
+GROCERIES_DONE_ROW = MappingProxyType({**GROCERIES_ROW, "status": "completed"})
+PUT_AWAY_ROW = MappingProxyType({"id": "456", "title": "Put away groceries", "status": "pending", "priority": "low"})
+
+# Tool name -> handler, so tables can name the tool instead of importing it
+HANDLERS = {
+    "smart_add": handle_smart_add,
+    "search_tasks": handle_search_tasks,
+    "smart_update": handle_smart_update,
+}
+
+# (tool name, arguments, text expected in the reply) for inputs rejected before any query
+ERROR_CASES = [
+    pytest.param("smart_add", {}, "❌ Error: natural_language parameter is required", id="smart-add-missing"),
+    pytest.param("search_tasks", {"query": ""}, "❌ Error: query parameter is required", id="search-empty"),
+    pytest.param("smart_update", {}, "❌ Error: natural_language parameter is required", id="smart-update-missing"),
+]
+
+
+@pytest.fixture(scope="module")
+def groceries_update_payload():
+    """The "mark groceries as done" update the agent extracts; read-only and shared."""
+    return MappingProxyType({"task_match": "groceries", "updates": MappingProxyType({"status": "completed"})})
+
+
+async def stream_tasks(tasks):
+    """Yield parsed tasks like TaskAgent.iter_task_nl_async."""
+    for task in tasks:
+        yield task
+
 
 class TestSmartAdd:
     """Tests for smart_add tool."""
     
     @pytest.mark.asyncio
-    async def test_smart_add_success(self):
+    async def test_smart_add_success(self, stub_smart_db, mocked_smart_agent):
         """Test successful task creation from natural language."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
         # Mock agent parsing
-        mock_agent.parse_task_nl.return_value = {
+        mocked_smart_agent.iter_task_nl_async.return_value = stream_tasks([{
             "title": "Buy groceries",
             "priority": "high",
             "category": "shopping",
             "due_date": "2026-01-03T17:00:00"
-        }
+        }])
         
         # Mock database creation
-        mock_db.create_task.return_value = {
+        stub_smart_db.returns["create_task"] = {
             "id": "123",
             "title": "Buy groceries",
             "priority": "high",
@@ -41,44 +69,88 @@ class TestSmartAdd:
             "due_date": "2026-01-03T17:00:00"
         }
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_smart_add({
-                "natural_language": "Buy groceries tomorrow at 5pm, urgent"
-            })
-            
-            assert len(result) == 1
-            assert isinstance(result[0], TextContent)
-            assert "✅ Task created successfully!" in result[0].text
-            assert "Buy groceries" in result[0].text
-            mock_agent.parse_task_nl.assert_called_once()
-            mock_db.create_task.assert_called_once()
+        result = await handle_smart_add({
+            "natural_language": "Buy groceries tomorrow at 5pm, urgent"
+        })
+        
+        assert len(result) == 1
+        assert isinstance(result[0], TextContent)
+        text = result[0].text
+        assert "✅ Task created successfully!" in text
+        assert "Buy groceries" in text
+        mocked_smart_agent.iter_task_nl_async.assert_called_once()
+        assert len(stub_smart_db.called("create_task")) == 1
+        assert stub_smart_db.called("create_task")[0][0][0]["status"] == "pending"
     
     @pytest.mark.asyncio
-    async def test_smart_add_missing_parameter(self):
-        """Test smart_add with missing natural_language parameter."""
-        result = await handle_smart_add({})
+    async def test_smart_add_creates_every_parsed_task(self, stub_smart_db, mocked_smart_agent):
+        """Test that a multi-task input creates one row per streamed task."""
+        mocked_smart_agent.iter_task_nl_async.return_value = stream_tasks([
+            {"title": "Buy milk", "priority": "medium"},
+            {"title": "Call mom", "priority": "high"}
+        ])
+        stub_smart_db.returns["create_task"] = lambda task: {**task, "id": task["title"].lower()}
         
-        assert len(result) == 1
-        assert "❌ Error" in result[0].text
-        assert "natural_language parameter is required" in result[0].text
+        result = await handle_smart_add({"natural_language": "buy milk and call mom asap"})
+        
+        text = result[0].text
+        assert "✅ Created 2 tasks!" in text
+        assert "Buy milk" in text
+        assert "Call mom" in text
+        assert len(stub_smart_db.called("create_task")) == 2
+    
+    @pytest.mark.asyncio
+    async def test_smart_add_reports_created_tasks_on_partial_failure(self, stub_smart_db, mocked_smart_agent):
+        """Test that a failed insert is reported next to the tasks that were created."""
+        mocked_smart_agent.iter_task_nl_async.return_value = stream_tasks([
+            {"title": "Buy milk", "priority": "medium"},
+            {"title": "Call mom", "priority": "high"}
+        ])
+        
+        async def create_task(task):
+            if task["title"] == "Call mom":
+                raise RuntimeError("connection reset")
+            return {**task, "id": "milk-1"}
+        
+        stub_smart_db.returns["create_task"] = create_task
+        
+        result = await handle_smart_add({"natural_language": "buy milk and call mom asap"})
+        
+        text = result[0].text
+        assert "⚠️ Created 1 task(s); 1 failed" in text
+        assert "🆔 ID: milk-1" in text
+        assert "connection reset" in text
+        assert len(stub_smart_db.called("create_task")) == 2
+    
+    @pytest.mark.asyncio
+    async def test_smart_add_awaits_started_inserts_when_stream_fails(self, stub_smart_db, mocked_smart_agent):
+        """Test that tasks inserted before a mid-stream failure are still awaited and reported."""
+        async def failing_stream(natural_language):
+            yield {"title": "Buy milk", "priority": "medium"}
+            raise RuntimeError("stream dropped")
+        
+        mocked_smart_agent.iter_task_nl_async.side_effect = failing_stream
+        stub_smart_db.returns["create_task"] = lambda task: {**task, "id": "milk-1"}
+        
+        result = await handle_smart_add({"natural_language": "buy milk and call mom"})
+        
+        text = result[0].text
+        assert "🆔 ID: milk-1" in text
+        assert "stream dropped" in text
+        assert len(stub_smart_db.called("create_task")) == 1
 
 
 class TestSearchTasks:
     """Tests for search_tasks tool."""
     
     @pytest.mark.asyncio
-    async def test_search_tasks_with_filters(self):
+    async def test_search_tasks_with_filters(self, stub_smart_db, mocked_smart_agent):
         """Test search with structured filters."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
         # Mock agent returning filters
-        mock_agent.search_tasks_nl.return_value = {"priority": "high"}
+        mocked_smart_agent.search_tasks_nl_async.return_value = {"priority": "high"}
         
-        # Mock database search
-        mock_db.list_tasks.return_value = [
+        # Stub database search
+        stub_smart_db.returns["list_tasks"] = [
             {
                 "id": "123",
                 "title": "Urgent Task",
@@ -87,164 +159,179 @@ class TestSearchTasks:
             }
         ]
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_search_tasks({
-                "query": "Show me high priority tasks"
-            })
-            
-            assert len(result) == 1
-            assert "Found 1 task(s)" in result[0].text
-            assert "Urgent Task" in result[0].text
-            mock_agent.search_tasks_nl.assert_called_once()
+        result = await handle_search_tasks({
+            "query": "Show me high priority tasks"
+        })
+        
+        assert len(result) == 1
+        text = result[0].text
+        assert "Found 1 task(s)" in text
+        assert "Urgent Task" in text
+        mocked_smart_agent.search_tasks_nl_async.assert_awaited_once()
     
     @pytest.mark.asyncio
-    async def test_search_tasks_text_search(self):
+    async def test_search_tasks_text_search(self, stub_smart_db, mocked_smart_agent):
         """Test search with text query."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
         # Mock agent returning text search
-        mock_agent.search_tasks_nl.return_value = {"search_text": "groceries"}
+        mocked_smart_agent.search_tasks_nl_async.return_value = {"search_text": "groceries"}
         
-        # Mock database text search
-        mock_db.search_tasks.return_value = [
-            {
-                "id": "456",
-                "title": "Buy groceries",
-                "status": "pending",
-                "priority": "medium"
-            }
-        ]
+        # Stub database text search
+        stub_smart_db.returns["search_tasks"] = [GROCERIES_ROW]
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_search_tasks({
-                "query": "Find tasks about groceries"
-            })
-            
-            assert len(result) == 1
-            assert "Buy groceries" in result[0].text
-            mock_db.search_tasks.assert_called_once_with("groceries")
+        result = await handle_search_tasks({
+            "query": "Find tasks about groceries"
+        })
+        
+        assert len(result) == 1
+        assert "Buy groceries" in result[0].text
+        assert stub_smart_db.called("search_tasks") == [(("groceries",), {"status": None, "priority": None})]
     
     @pytest.mark.asyncio
-    async def test_search_tasks_no_results(self):
+    async def test_search_tasks_no_results(self, stub_smart_db, mocked_smart_agent):
         """Test search with no matching tasks."""
-        mock_db = Mock()
-        mock_agent = Mock()
+        mocked_smart_agent.search_tasks_nl_async.return_value = {"status": "completed"}
+        stub_smart_db.returns["list_tasks"] = []
+        
+        result = await handle_search_tasks({"query": "Show completed tasks"})
+        
+        assert "No tasks found" in result[0].text
+    
+    @pytest.mark.asyncio
+    async def test_filter_only_search_reuses_recent_tasks(self, stub_smart_db, mocked_smart_agent):
+        """Test that a partial page of recent tasks is filtered without another query."""
+        mocked_smart_agent.search_tasks_nl_async.return_value = {"status": "pending", "priority": "high"}
+        stub_smart_db.returns["list_tasks"] = [
+            {"id": "1", "title": "Ship release", "status": "pending", "priority": "high"},
+            {"id": "2", "title": "Water plants", "status": "pending", "priority": "low"},
+            {"id": "3", "title": "File taxes", "status": "completed", "priority": "high"}
+        ]
         
-        mock_agent.search_tasks_nl.return_value = {"status": "completed"}
-        mock_db.list_tasks.return_value = []
+        result = await handle_search_tasks({"query": "urgent pending work"})
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_search_tasks({"query": "Show completed tasks"})
-            
-            assert "No tasks found" in result[0].text
+        text = result[0].text
+        assert "Found 1 task(s)" in text
+        assert "Ship release" in text
+        assert stub_smart_db.calls == [("list_tasks", (), {"limit": 100})]
+    
+    @pytest.mark.asyncio
+    async def test_filter_only_search_queries_past_full_page(self, stub_smart_db, mocked_smart_agent):
+        """Test that a full page of recent tasks falls back to a filtered query."""
+        mocked_smart_agent.search_tasks_nl_async.return_value = {"status": "completed"}
+        stub_smart_db.returns["list_tasks"] = [
+            {"id": str(i), "title": f"Task {i}", "status": "completed", "priority": "medium"}
+            for i in range(100)
+        ]
+        
+        await handle_search_tasks({"query": "Show completed tasks"})
+        
+        assert stub_smart_db.called("list_tasks") == [
+            ((), {"limit": 100}),
+            ((), {"status": "completed", "priority": None, "limit": 100})
+        ]
 
 
 class TestSmartUpdate:
     """Tests for smart_update tool."""
     
     @pytest.mark.asyncio
-    async def test_smart_update_success(self):
+    async def test_smart_update_success(self, stub_smart_db, mocked_smart_agent, groceries_update_payload):
         """Test successful task update."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
         # Mock existing tasks
-        mock_db.list_tasks.return_value = [
-            {"id": "123", "title": "Buy groceries", "status": "pending", "priority": "medium"}
-        ]
+        stub_smart_db.returns["list_tasks"] = [GROCERIES_ROW]
+        stub_smart_db.returns["search_tasks"] = [GROCERIES_ROW]
         
         # Mock agent extraction
-        mock_agent.extract_task_update.return_value = {
-            "task_match": "groceries",
-            "updates": {"status": "completed"}
-        }
+        mocked_smart_agent.extract_task_update_async.return_value = groceries_update_payload
         
         # Mock fuzzy matching
-        mock_agent.find_matching_task.return_value = "123"
+        mocked_smart_agent.find_matching_task.return_value = ("123", [])
         
         # Mock database update
-        mock_db.update_task.return_value = {
-            "id": "123",
-            "title": "Buy groceries",
-            "status": "completed",
-            "priority": "medium"
-        }
+        stub_smart_db.returns["update_task"] = GROCERIES_DONE_ROW
+        
+        result = await handle_smart_update({
+            "natural_language": "Mark the groceries task as done"
+        })
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_smart_update({
-                "natural_language": "Mark the groceries task as done"
-            })
-            
-            assert len(result) == 1
-            assert "✅ Task updated successfully!" in result[0].text
-            assert "completed" in result[0].text
+        assert len(result) == 1
+        text = result[0].text
+        assert "✅ Task updated successfully!" in text
+        assert "completed" in text
+        assert stub_smart_db.called("update_task") == [(("123", groceries_update_payload["updates"]), {})]
+        assert stub_smart_db.called("search_tasks") == [(("groceries",), {})]
+        assert stub_smart_db.called("list_tasks") == [((), {"limit": 10})]
     
     @pytest.mark.asyncio
-    async def test_smart_update_multiple_matches(self):
+    async def test_smart_update_multiple_matches(self, stub_smart_db, mocked_smart_agent, groceries_update_payload):
         """Test update with multiple matching tasks (clarification needed)."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
         # Mock multiple existing tasks
-        mock_db.list_tasks.return_value = [
-            {"id": "123", "title": "Buy groceries", "status": "pending", "priority": "medium"},
-            {"id": "456", "title": "Put away groceries", "status": "pending", "priority": "low"}
-        ]
+        stub_smart_db.returns["list_tasks"] = [GROCERIES_ROW, PUT_AWAY_ROW]
+        stub_smart_db.returns["search_tasks"] = [GROCERIES_ROW, PUT_AWAY_ROW]
         
-        mock_agent.extract_task_update.return_value = {
-            "task_match": "groceries",
-            "updates": {"status": "completed"}
-        }
+        mocked_smart_agent.extract_task_update_async.return_value = groceries_update_payload
         
         # Mock fuzzy matching returning None (multiple matches)
-        mock_agent.find_matching_task.return_value = None
-        
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_smart_update({
-                "natural_language": "Mark groceries as done"
-            })
-            
-            assert len(result) == 1
-            assert "Found 2 tasks matching" in result[0].text
-            assert "Buy groceries" in result[0].text
-            assert "Put away groceries" in result[0].text
+        mocked_smart_agent.find_matching_task.return_value = (None, [GROCERIES_ROW, PUT_AWAY_ROW])
+        
+        result = await handle_smart_update({
+            "natural_language": "Mark groceries as done"
+        })
+        
+        assert len(result) == 1
+        text = result[0].text
+        assert "Found 2 tasks matching" in text
+        assert "Buy groceries" in text
+        assert "Put away groceries" in text
     
     @pytest.mark.asyncio
-    async def test_smart_update_no_match(self):
+    async def test_smart_update_no_match(self, stub_smart_db, mocked_smart_agent, groceries_update_payload):
         """Test update with no matching task."""
-        mock_db = Mock()
-        mock_agent = Mock()
-        
-        mock_db.list_tasks.return_value = [
+        stub_smart_db.returns["list_tasks"] = [
             {"id": "123", "title": "Buy milk", "status": "pending", "priority": "medium"}
         ]
+        stub_smart_db.returns["search_tasks"] = []
         
-        mock_agent.extract_task_update.return_value = {
-            "task_match": "groceries",
-            "updates": {"status": "completed"}
-        }
+        mocked_smart_agent.extract_task_update_async.return_value = groceries_update_payload
+        
+        mocked_smart_agent.find_matching_task.return_value = (None, [])
+        
+        result = await handle_smart_update({
+            "natural_language": "Mark groceries as done"
+        })
         
-        mock_agent.find_matching_task.return_value = None
+        assert "No task found matching" in result[0].text
+        # An empty text search falls back to scanning every task
+        assert stub_smart_db.called("list_tasks")[-1] == ((), {"limit": 1000})
+    
+    @pytest.mark.asyncio
+    async def test_smart_update_rescans_when_search_hits_miss(self, stub_smart_db, mocked_smart_agent, groceries_update_payload):
+        """Test that unrelated text-search hits still fall back to scanning every task."""
+        stub_smart_db.returns["search_tasks"] = [PUT_AWAY_ROW]
+        stub_smart_db.returns["list_tasks"] = [GROCERIES_ROW]
+        mocked_smart_agent.extract_task_update_async.return_value = groceries_update_payload
+        mocked_smart_agent.find_matching_task.side_effect = [(None, []), ("123", [GROCERIES_ROW])]
+        stub_smart_db.returns["update_task"] = GROCERIES_DONE_ROW
+        
+        result = await handle_smart_update({"natural_language": "Mark groceries as done"})
         
-        with patch("src.mcp_server.tools.smart.db", mock_db), \
-             patch("src.mcp_server.tools.smart.agent", mock_agent):
-            
-            result = await handle_smart_update({
-                "natural_language": "Mark groceries as done"
-            })
-            
-            assert "No task found matching" in result[0].text
+        assert "✅ Task updated successfully!" in result[0].text
+        assert stub_smart_db.called("list_tasks")[-1] == ((), {"limit": 1000})
+        assert mocked_smart_agent.find_matching_task.call_args.args == ("groceries", [GROCERIES_ROW])
+
+
+class TestErrorPaths:
+    """Tests for handler inputs that are answered without the database or the LLM."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("tool,arguments,expected", ERROR_CASES)
+    async def test_error_paths(self, stub_smart_db, mocked_smart_agent, tool, arguments, expected):
+        """Test that the handler replies with the expected error and makes no calls."""
+        result = await HANDLERS[tool](arguments)
+        
+        assert len(result) == 1
+        assert expected in result[0].text
+        assert stub_smart_db.calls == []
+        assert mocked_smart_agent.method_calls == []
 
 
 if __name__ == "__main__":
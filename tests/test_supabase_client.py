@@ -0,0 +1,331 @@
+"""
+Unit tests for the Supabase database client.
+
+These tests mock the Supabase SDK so no network calls are made.
+"""
+import asyncio
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from database.supabase_client import SupabaseClient
+
+
+def make_sdk_client(data):
+    """Build a fake AsyncClient whose queries resolve to the given rows."""
+    query = MagicMock()
+    query.execute = AsyncMock(return_value=MagicMock(data=data, count=len(data)))
+    for method in ("select", "insert", "update", "delete", "eq", "or_", "text_search", "order", "limit", "offset"):
+        getattr(query, method).return_value = query
+    
+    sdk_client = MagicMock()
+    sdk_client.table.return_value = query
+    return sdk_client
+
+
+class TestSupabaseClient:
+    """Tests for lazy initialization and async queries."""
+    
+    @pytest.mark.asyncio
+    async def test_client_created_once_under_concurrency(self):
+        """Test that concurrent first calls share one SDK client."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)) as create:
+            db = SupabaseClient()
+            results = await asyncio.gather(*(db.get_task("1") for _ in range(5)))
+        
+        assert all(result == {"id": "1", "title": "Task"} for result in results)
+        create.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    async def test_missing_task_returns_none(self):
+        """Test that an empty result maps to None."""
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=make_sdk_client([]))):
+            db = SupabaseClient()
+            
+            assert await db.get_task("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_create_tasks_uses_one_insert(self):
+        """Test that bulk creation sends every row in a single insert."""
+        rows = [{"id": "1", "title": "A"}, {"id": "2", "title": "B"}]
+        sdk_client = make_sdk_client(rows)
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            created = await db.create_tasks([{"title": "A"}, {"title": "B"}])
+        
+        query = sdk_client.table.return_value
+        query.insert.assert_called_once()
+        assert query.insert.call_args.kwargs == {"default_to_null": False}
+        inserted = query.insert.call_args.args[0]
+        assert [task["title"] for task in inserted] == ["A", "B"]
+        assert all("updated_at" in task for task in inserted)
+        assert created == rows
+        assert query.execute.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_task_count_uses_head_request(self):
+        """Test that counting asks PostgREST for the count header only."""
+        sdk_client = make_sdk_client([])
+        query = sdk_client.table.return_value
+        query.execute.return_value = MagicMock(data=[], count=7)
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            count = await db.get_task_count(status="pending")
+        
+        assert count == 7
+        query.select.assert_called_once_with("id", count="exact", head=True)
+    
+    @pytest.mark.asyncio
+    async def test_rows_never_carry_the_fts_vector(self):
+        """Test that reads select explicit columns and writes strip the generated fts column."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task", "fts": "'task':1"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            await db.list_tasks()
+            created = await db.create_task({"title": "Task"})
+        
+        columns = sdk_client.table.return_value.select.call_args.args[0].split(",")
+        assert "fts" not in columns and {"id", "title", "updated_at"} <= set(columns)
+        assert created == {"id": "1", "title": "Task"}
+
+
+class TestQueryCache:
+    """Tests for the read-query cache in front of Supabase."""
+    
+    @pytest.mark.asyncio
+    async def test_repeated_read_is_served_from_cache(self):
+        """Test that an identical query hits the database only once."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            first = await db.list_tasks(status="pending")
+            first[0]["title"] = "Mutated"
+            second = await db.list_tasks(status="pending")
+        
+        assert second == [{"id": "1", "title": "Task"}]
+        assert sdk_client.table.return_value.execute.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_write_invalidates_cache(self):
+        """Test that reads after a write go back to the database."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            await db.get_task_count()
+            await db.update_task("1", {"status": "completed"})
+            await db.get_task_count()
+        
+        assert sdk_client.table.return_value.execute.await_count == 3
+    
+    @pytest.mark.asyncio
+    async def test_nocache_bypasses_cache(self):
+        """Test that nocache forces a fresh query."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            await db.get_task("1")
+            await db.get_task("1", nocache=True)
+        
+        assert sdk_client.table.return_value.execute.await_count == 2
+
+
+class TestSearchTasks:
+    """Tests for full-text task search."""
+    
+    @pytest.mark.asyncio
+    async def test_search_uses_websearch_fts(self):
+        """Test that the raw query is passed to a websearch text search."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Buy milk"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            results = await db.search_tasks("milk, eggs (organic)", user_id="u1")
+        
+        query = sdk_client.table.return_value
+        assert results == [{"id": "1", "title": "Buy milk"}]
+        query.eq.assert_called_once_with("user_id", "u1")
+        query.text_search.assert_called_once_with(
+            "fts", "milk, eggs (organic)", options={"type": "web_search", "config": "english"}
+        )
+        query.or_.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_search_combines_filters(self):
+        """Test that status and priority are AND-ed into the same query."""
+        sdk_client = make_sdk_client([])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            await db.search_tasks("report", status="pending", priority="high")
+        
+        query = sdk_client.table.return_value
+        assert query.eq.call_args_list == [(("status", "pending"),), (("priority", "high"),)]
+        query.text_search.assert_called_once()
+        assert query.execute.await_count == 1
+
+
+class TestInflightDedup:
+    """Tests for coalescing concurrent identical reads."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_searches_share_one_query(self):
+        """Test that identical concurrent searches issue a single query."""
+        sdk_client = make_sdk_client([{"id": "1", "title": "Task"}])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            results = await asyncio.gather(*(db.search_tasks("task") for _ in range(5)))
+        
+        assert all(result == [{"id": "1", "title": "Task"}] for result in results)
+        assert len({id(result) for result in results}) == 5
+        assert sdk_client.table.return_value.execute.await_count == 1
+        assert db._inflight == {}
+    
+    @pytest.mark.asyncio
+    async def test_different_arguments_are_not_coalesced(self):
+        """Test that queries with different arguments run separately."""
+        sdk_client = make_sdk_client([])
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            await asyncio.gather(db.search_tasks("milk"), db.search_tasks("bread"))
+        
+        assert sdk_client.table.return_value.execute.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller(self):
+        """Test that a failed shared query raises in all waiting callers."""
+        sdk_client = make_sdk_client([])
+        sdk_client.table.return_value.execute.side_effect = RuntimeError("boom")
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            results = await asyncio.gather(
+                *(db.list_tasks() for _ in range(3)), return_exceptions=True
+            )
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert sdk_client.table.return_value.execute.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_query_cancelled_with_its_last_waiter(self):
+        """Test that the shared query stops once every caller has been cancelled."""
+        started, cancelled = asyncio.Event(), asyncio.Event()
+        
+        async def slow_execute():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        sdk_client = make_sdk_client([])
+        sdk_client.table.return_value.execute.side_effect = slow_execute
+        
+        with patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            first = asyncio.ensure_future(db.list_tasks())
+            second = asyncio.ensure_future(db.list_tasks())
+            await started.wait()
+            
+            first.cancel()
+            await asyncio.sleep(0)
+            assert not cancelled.is_set()
+            
+            second.cancel()
+            await asyncio.wait_for(cancelled.wait(), timeout=1)
+            # Let the cancelled query's done callback run
+            await asyncio.sleep(0)
+        
+        assert db._inflight == {}
+
+
+
+def make_asyncpg(fetchval_result):
+    """Build a fake asyncpg module whose pool connections return fetchval_result."""
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=fetchval_result)
+    acquire = MagicMock()
+    acquire.__aenter__ = AsyncMock(return_value=conn)
+    acquire.__aexit__ = AsyncMock(return_value=False)
+    
+    pool = MagicMock()
+    pool.acquire.return_value = acquire
+    pool.close = AsyncMock()
+    
+    module = MagicMock()
+    module.create_pool = AsyncMock(return_value=pool)
+    return module, conn
+
+
+class TestAsyncpgReads:
+    """Tests for the optional direct Postgres read path."""
+    
+    ENV = {"USE_ASYNCPG": "1", "DATABASE_URL": "postgresql://user:pw@db:6543/postgres"}
+    
+    @pytest.mark.asyncio
+    async def test_list_tasks_bypasses_postgrest(self):
+        """Test that list_tasks runs one parameterized SQL query on the pool."""
+        sdk_client = make_sdk_client([])
+        fake_asyncpg, conn = make_asyncpg('[{"id": "1", "title": "Task"}]')
+        
+        with patch.dict("os.environ", self.ENV), \
+                patch("database.supabase_client.asyncpg", fake_asyncpg), \
+                patch("database.supabase_client.acreate_client", AsyncMock(return_value=sdk_client)):
+            db = SupabaseClient()
+            tasks = await db.list_tasks(status="pending", limit=5)
+            await db.aclose()
+        
+        assert tasks == [{"id": "1", "title": "Task"}]
+        sql, *args = conn.fetchval.call_args.args
+        assert "WHERE status = $1" in sql
+        assert "LIMIT $2 OFFSET $3" in sql
+        assert "fts" not in sql and "SELECT *" not in sql
+        assert args == ["pending", 5, 0]
+        assert fake_asyncpg.create_pool.call_args.kwargs["statement_cache_size"] == 0
+        sdk_client.table.return_value.execute.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_count_without_filters(self):
+        """Test that an unfiltered count has no WHERE clause."""
+        fake_asyncpg, conn = make_asyncpg(12)
+        
+        with patch.dict("os.environ", self.ENV), \
+                patch("database.supabase_client.asyncpg", fake_asyncpg), \
+                patch("database.supabase_client.acreate_client", AsyncMock(return_value=make_sdk_client([]))):
+            db = SupabaseClient()
+            count = await db.get_task_count()
+        
+        assert count == 12
+        conn.fetchval.assert_awaited_once_with("SELECT count(*) FROM tasks")
+    
+    @pytest.mark.asyncio
+    async def test_pool_size_from_environment(self):
+        """Test that DB_POOL_MIN/DB_POOL_MAX size both connection pools."""
+        fake_asyncpg, _ = make_asyncpg(0)
+        env = {**self.ENV, "DB_POOL_MIN": "5", "DB_POOL_MAX": "8"}
+        
+        with patch.dict("os.environ", env), \
+                patch("database.supabase_client.asyncpg", fake_asyncpg), \
+                patch("database.supabase_client.httpx.Limits", wraps=httpx.Limits) as limits, \
+                patch("database.supabase_client.acreate_client", AsyncMock(return_value=make_sdk_client([]))):
+            db = SupabaseClient()
+            await db.init()
+            await db.aclose()
+        
+        kwargs = fake_asyncpg.create_pool.call_args.kwargs
+        assert (kwargs["min_size"], kwargs["max_size"]) == (5, 8)
+        assert limits.call_args.kwargs["max_connections"] == 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])